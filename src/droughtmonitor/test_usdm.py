@@ -1,8 +1,40 @@
 
+import json
 import pytest
 from droughtmonitor import usdm
 
 
+def county_get(mocker, years=(2020,), status=None, fetched=None, **fields):
+    """
+    Build a fake requests.Session.get for county statistics. Each response has
+    a map of 01/07 of every year in years, with d0 set to the county queried
+    (as a float) plus any extra fields. status(county, url) may return a
+    status code to fail the request with; the counties of successful
+    requests are appended to fetched.
+    """
+    def fake_get(url, headers=None, **kwargs):
+        county = url.split("aoi=")[1].split("&")[0]
+        response = mocker.Mock()
+        status_code = status(county, url) if status is not None else None
+        if status_code is not None:
+            response.status_code = status_code
+            return response
+        if fetched is not None:
+            fetched.append(county)
+        response.status_code = 200
+        response.json.return_value = [{
+            "mapDate": f"{year}-01-07T00:00:00",
+            "validStart": f"{year}-01-07T00:00:00",
+            "validEnd": f"{year}-01-13T23:59:59",
+            "d0": float(county),
+            **fields,
+        } for year in years]
+        response.content = json.dumps(response.json.return_value).encode()
+        return response
+
+    return fake_get
+
+
 def test_determine_date_type():
     assert usdm.determine_date_type([2020, 2021, 2022]) == "year"
     assert usdm.determine_date_type(["2020-01-01", "2022/12/31"]) == "date"
@@ -97,8 +129,9 @@ def test_get_weeks_in_drought(mocker):
             'county': 'Butler County'
         }
     ]
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
 
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     # Create a USDM object
     drought_object = usdm.USDM(geography="AL", time_period=2023)
@@ -161,7 +194,8 @@ def test_get_comp_stats(mocker):
             'statisticFormatID': 1
         }
     ]
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     # Create a USDM object
     drought_object = usdm.USDM(geography="VA", time_period=2023)
@@ -287,15 +321,16 @@ def test_get_spatial_data(mocker):
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = mock_geojson
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.content = json.dumps(mock_geojson).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     # Mock geopandas.read_file to return a GeoDataFrame
     mock_gdf = gpd.GeoDataFrame.from_features(mock_geojson['features'])
     mocker.patch("geopandas.read_file", return_value=mock_gdf)
 
     mock_map_date = "20231231"
-    mocker.patch("droughtmonitor.usdm.get_closest_mapdate",
-                 return_value=mock_map_date)
+    mocker.patch("droughtmonitor.usdm.get_closest_mapdates",
+                 return_value=[mock_map_date])
 
     # Create a USDM object
     drought_object = usdm.USDM(geography="TOTAL", time_period="2023-12-31")
@@ -404,7 +439,8 @@ def test_get_comp_stats_with_group_by_county(mocker):
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = [mock_county_response]
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
     
     # Mock get_counties_in_state to return just a few counties for testing
     mock_counties = ["06001", "06003", "06005"]  # Alameda, Alpine, Amador
@@ -450,7 +486,8 @@ def test_get_comp_stats_with_group_by_state(mocker):
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = [mock_state_response]
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
     
     # Mock get_all_states to return just a few states for testing
     mock_states = ["CA", "TX", "NY"]
@@ -491,7 +528,8 @@ def test_get_weeks_in_drought_ignores_group_by(mocker):
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = [mock_weeks_response]
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
     
     # Create USDM objects with and without group_by - should behave identically
     drought_obj_no_group = usdm.USDM(geography="CA", time_period=[2020])
@@ -596,7 +634,8 @@ def test_confirmation_bypass(mocker):
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = [{"mapDate": "2020-01-07", "d0": 100}]
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     # Mock estimate_api_calls to return high count
     mocker.patch("droughtmonitor.usdm.estimate_api_calls", return_value=1000)
@@ -617,7 +656,8 @@ def test_list_geography_get_comp_stats(mocker):
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = [{"mapDate": "2020-01-07", "d0": 100}]
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
 
     # Mock get_counties_in_state to return fixed counties
     mocker.patch("droughtmonitor.usdm.get_counties_in_state",
@@ -652,3 +692,1023 @@ def test_confirm_parameters():
 
 
 # 
+
+
+def test_get_comp_stats_concurrent_preserves_order(mocker):
+    """Test that max_workers > 1 returns the same rows in the same order."""
+
+    # each response identifies the county that was queried
+    mocker.patch("requests.Session.get", side_effect=county_get(mocker))
+    mock_counties = ["06001", "06003", "06005", "06007", "06009"]
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=mock_counties)
+
+    serial = usdm.USDM(geography="CA", group_by="county", time_period=[2020],
+                       confirm=False).get_comp_stats(stat=["Area"])
+    concurrent = usdm.USDM(geography="CA", group_by="county",
+                           time_period=[2020], confirm=False,
+                           max_workers=4).get_comp_stats(stat=["Area"])
+
+    assert list(concurrent["county_fips"]) == mock_counties
+    assert list(concurrent["D0_Area"]) == [float(c) for c in mock_counties]
+    usdm.pd.testing.assert_frame_equal(serial, concurrent)
+
+    with pytest.raises(ValueError, match="max_workers must be a positive integer"):
+        usdm.USDM(geography="CA", time_period=[2020], max_workers=0)
+
+
+def test_usdm_session(mocker):
+    """Test that every request is sent through the object's pooled session."""
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = [{"mapDate": "2020-01-07", "d0": 100}]
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_response)
+
+    drought_obj = usdm.USDM(geography="CA", time_period=[2020],
+                            pool_size=4, timeout=5)
+    adapter = drought_obj.session.get_adapter("https://usdmdataservices.unl.edu")
+    assert adapter._pool_maxsize == 4
+    assert "gzip" in drought_obj.session.headers["Accept-Encoding"]
+
+    drought_obj.get_comp_stats(stat=["Area"])
+    assert mock_get.call_args.kwargs["timeout"] == 5
+
+    # a supplied session is used as is and not closed by the object
+    session = usdm.create_session()
+    close = mocker.spy(session, "close")
+    with usdm.USDM(geography="CA", time_period=[2020], session=session) as obj:
+        assert obj.session is session
+    close.assert_not_called()
+
+    # non-200 responses still raise
+    mock_response.status_code = 500
+    with pytest.raises(Exception, match="HTTP status code: 500"):
+        usdm.fetch("https://usdmdataservices.unl.edu/api/")
+
+
+def test_async_usdm_matches_usdm(mocker):
+    """Test that AsyncUSDM coroutines return the same data as USDM."""
+    import asyncio
+
+    mocker.patch("requests.Session.get", side_effect=county_get(mocker, none=1.0))
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=["06001", "06003", "06005"])
+
+    kwargs = dict(geography="CA", group_by="county", time_period=[2020],
+                  confirm=False)
+    expected = usdm.USDM(**kwargs).get_comp_stats(stat=["Area", "DSCI"])
+
+    async def main():
+        semaphore = asyncio.Semaphore(2)
+        objects = [usdm.AsyncUSDM(semaphore=semaphore, **kwargs)
+                   for _ in range(3)]
+        return await asyncio.gather(
+            *(o.get_comp_stats(stat=["Area", "DSCI"]) for o in objects))
+
+    for result in asyncio.run(main()):
+        usdm.pd.testing.assert_frame_equal(result, expected)
+
+    # the confirmation prompt runs in a worker thread, off the event loop
+    import threading
+    prompt_threads = []
+
+    def fake_prompt(*args, **kwargs):
+        prompt_threads.append(threading.current_thread())
+        return False
+
+    mocker.patch("droughtmonitor.usdm.prompt_user_confirmation", side_effect=fake_prompt)
+    cancelled = asyncio.run(usdm.AsyncUSDM(geography="CA", group_by="county",
+                                           time_period=[2020]).get_comp_stats())
+    assert cancelled.empty
+    assert prompt_threads and threading.main_thread() not in prompt_threads
+
+    with pytest.raises(ValueError, match="max_concurrency must be a positive integer"):
+        usdm.AsyncUSDM(geography="CA", time_period=[2020], max_concurrency=0)
+
+
+def test_async_usdm_concurrency(mocker):
+    """Test that AsyncUSDM keeps max_concurrency calls in flight, in any
+    number of event loops."""
+    import asyncio
+    import threading
+    import time
+
+    lock = threading.Lock()
+    in_flight = [0, 0]
+    county_response = county_get(mocker)
+
+    def slow_get(url, headers=None, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return county_response(url)
+
+    mocker.patch("requests.Session.get", side_effect=slow_get)
+    counties = [f"06{i:03d}" for i in range(1, 161, 2)]
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state", return_value=counties)
+    mocker.patch("droughtmonitor.usdm.prompt_user_confirmation", return_value=True)
+    duration = mocker.spy(usdm, "estimate_duration")
+
+    # more calls than the event loop's default executor has threads
+    with usdm.AsyncUSDM(geography="CA", group_by="county", time_period=[2020],
+                        max_concurrency=64) as drought_obj:
+        result = asyncio.run(drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0]))
+    assert list(result["county_fips"]) == counties
+    assert in_flight[1] == 64
+    assert duration.call_args.args[1] == 64
+
+    # the same object can be awaited in a second event loop
+    in_flight[1] = 0
+    with usdm.AsyncUSDM(geography="CA", group_by="county", time_period=[2020],
+                        max_concurrency=2, confirm=False) as drought_obj:
+        for _ in range(2):
+            result = asyncio.run(drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0]))
+            assert list(result["county_fips"]) == counties
+    assert in_flight[1] == 2
+
+
+def test_cache_expiry():
+    """Test that released data never expires and current data expires at the
+    next Thursday release."""
+    from datetime import datetime, timezone
+
+    # Friday after the 01/04/2024 release of the 01/02/2024 map
+    now = datetime(2024, 1, 5, tzinfo=timezone.utc)
+    latest_map, next_release = usdm.release_schedule(now)
+    assert latest_map == usdm.pd.Timestamp("2024-01-02")
+    assert next_release == datetime(2024, 1, 11, 13, 30, tzinfo=timezone.utc)
+
+    # Thursday morning, before the release
+    latest_map, _ = usdm.release_schedule(datetime(2024, 1, 4, 10, tzinfo=timezone.utc))
+    assert latest_map == usdm.pd.Timestamp("2023-12-26")
+
+    base = "https://usdmdataservices.unl.edu/api/StateStatistics/GetDSCI?aoi=06"
+    assert usdm.cache_expiry(f"{base}&startdate=01/01/2020&enddate=12/31/2023", now) is None
+    assert usdm.cache_expiry(f"{base}&startdate=01/01/2020&enddate=01/08/2024", now) is None
+    assert usdm.cache_expiry(f"{base}&startdate=01/01/2024&enddate=12/31/2024", now) == next_release.timestamp()
+    # dates entered as ISO dates keep a year first format
+    assert usdm.cache_expiry(f"{base}&startdate=2020/01/01&enddate=2023/12/31", now) is None
+    assert usdm.cache_expiry(f"{base}&startdate=01/01/2020&enddate=not-a-date", now) == next_release.timestamp()
+
+    maps = "https://droughtmonitor.unl.edu/data/json/usdm_{}.json"
+    assert usdm.cache_expiry(maps.format("20240102"), now) is None
+    assert usdm.cache_expiry(maps.format("20240109"), now) == next_release.timestamp()
+
+    # equivalent urls share a cache key
+    assert usdm.normalize_url(f"{base}&StartDate=01/01/2020") == \
+        usdm.normalize_url("HTTPS://USDMDATASERVICES.UNL.EDU/api/StateStatistics/GetDSCI?startdate=01/01/2020&aoi=06")
+
+
+def test_response_cache(mocker, tmp_path):
+    """Test that cached responses are not requested again."""
+
+    payload = [{"mapDate": "2020-01-07T00:00:00", "d0": 100.0}]
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = payload
+    mock_response.content = json.dumps(payload).encode()
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_response)
+
+    with usdm.USDM(geography="CA", time_period=[2020], cache=tmp_path) as obj:
+        first = obj.get_comp_stats(stat=["Area"])
+    assert mock_get.call_count == 1
+
+    # a new object using the same directory reads from the cache
+    with usdm.USDM(geography="CA", time_period=[2020], cache=tmp_path) as obj:
+        second = obj.get_comp_stats(stat=["Area"])
+    assert mock_get.call_count == 1
+    usdm.pd.testing.assert_frame_equal(first, second)
+
+    # after clearing the cache the data is requested again
+    cache = usdm.ResponseCache(tmp_path)
+    cache.clear()
+    usdm.USDM(geography="CA", time_period=[2020], cache=cache).get_comp_stats(stat=["Area"])
+    assert mock_get.call_count == 2
+
+    # ISO dates in the time period are cached too
+    for time_period in ["2023-12-31", ["2023-01-01", "2023-12-31"]]:
+        with usdm.USDM(geography="CA", time_period=time_period, cache=cache) as obj:
+            iso = obj.get_comp_stats(stat=["Area"])
+        with usdm.USDM(geography="CA", time_period=time_period, cache=cache) as obj:
+            usdm.pd.testing.assert_frame_equal(obj.get_comp_stats(stat=["Area"]), iso)
+    assert mock_get.call_count == 4
+
+
+def test_get_comp_stats_incremental_refresh(mocker, tmp_path):
+    """Test that previous results are only refreshed with new map weeks."""
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = [{
+        "mapDate": "2020-01-14T00:00:00",
+        "validStart": "2020-01-14T00:00:00",
+        "validEnd": "2020-01-20T23:59:59",
+        "d0": 2.0,
+    }]
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_response)
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=["06001", "06003"])
+    mocker.patch("droughtmonitor.usdm.load_map_dates",
+                 return_value=usdm.pd.Series(usdm.pd.to_datetime(
+                     ["2020-01-07", "2020-01-14"])))
+
+    # 06001 is missing the 01/14/2020 map, 06003 is up to date
+    previous = usdm.pd.DataFrame({
+        "mapDate": ["2020-01-07", "2020-01-07", "2020-01-14"],
+        "mapStartDate": ["2020-01-07", "2020-01-07", "2020-01-14"],
+        "mapEndDate": ["2020-01-13", "2020-01-13", "2020-01-20"],
+        "D0_Area": [1.0, 1.0, 2.0],
+        "county_fips": ["06001", "06003", "06003"],
+    })
+    path = tmp_path / "previous.csv"
+    previous.to_csv(path, index=False)
+
+    drought_obj = usdm.USDM(geography="CA", group_by="county",
+                            time_period=[2020], confirm=False)
+    result = drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0],
+                                        previous=path)
+
+    # only the new week of 06001 was requested
+    assert mock_get.call_count == 1
+    assert "aoi=06001" in mock_get.call_args.args[0]
+    assert "startdate=01/08/2020" in mock_get.call_args.args[0]
+
+    assert len(result) == 4
+    new_row = result.iloc[-1]
+    assert new_row["county_fips"] == "06001"
+    assert new_row["mapDate"] == usdm.pd.Timestamp("2020-01-14").date()
+
+    # nothing new: no statistics calls are made
+    again = drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0],
+                                       previous=result)
+    assert mock_get.call_count == 1
+    assert len(again) == 4
+
+    # AsyncUSDM refreshes the same way
+    import asyncio
+    async_obj = usdm.AsyncUSDM(geography="CA", group_by="county",
+                               time_period=[2020], confirm=False)
+    async_result = asyncio.run(async_obj.get_comp_stats(
+        stat=["Area"], drought_threshold=[0], previous=path))
+    assert mock_get.call_count == 2
+    usdm.pd.testing.assert_frame_equal(async_result, result)
+
+
+def test_get_closest_mapdates(mocker):
+    """Test the vectorized map date lookup against sorting every map date by
+    its distance to each date."""
+    import pandas as pd
+
+    # unsorted weekly map dates, as returned by the API
+    mock_dates = pd.Series(pd.date_range("2022-01-04", "2023-12-26", freq="7D")[::-1])
+    mocker.patch("droughtmonitor.usdm.load_map_dates", return_value=mock_dates)
+
+    dates = pd.date_range("2021-12-01", "2024-02-01")
+    expected = [mock_dates.iloc[(mock_dates - d).abs().argsort().iloc[0]].strftime("%Y%m%d")
+                for d in dates]
+    assert usdm.get_closest_mapdates(dates) == expected
+    assert usdm.get_closest_mapdates(["01/05/2022", "2023-12-30"]) == ["20220104", "20231226"]
+    # dates before the first and after the last map
+    assert usdm.get_closest_mapdates(["12/01/2021", "02/01/2024"]) == ["20220104", "20231226"]
+    assert usdm.get_closest_mapdate("2023-06-15") == "20230613"
+
+    # get_spatial_data resolves the whole range in one call, in order
+    mock_lookup = mocker.spy(usdm, "get_closest_mapdates")
+    drought_obj = usdm.USDM(geography="US", time_period=["01/01/2023", "01/31/2023"])
+    assert drought_obj._spatial_map_dates() == ["20230103", "20230110", "20230117",
+                                                "20230124", "20230131"]
+    assert mock_lookup.call_count == 1
+
+
+def test_map_date_calendar(mocker):
+    """Test that map dates are computed locally without an API call."""
+    from datetime import datetime, timezone
+
+    mock_get = mocker.patch("requests.Session.get")
+
+    now = datetime(2024, 1, 5, tzinfo=timezone.utc)
+    calendar = usdm.map_date_calendar(now)
+    assert calendar.iloc[0] == usdm.pd.Timestamp("2000-01-04")
+    assert calendar.iloc[-1] == usdm.pd.Timestamp("2024-01-02")
+    assert (calendar.dt.dayofweek == 1).all()  # every map is a Tuesday
+    assert (calendar.diff().dropna() == usdm.pd.Timedelta(days=7)).all()
+
+    assert len(usdm.load_map_dates()) > 0
+    assert usdm.get_closest_mapdate("2024-01-01") == "20240102"
+    mock_get.assert_not_called()
+
+    # irregular weeks are applied from the override list
+    overrides = usdm.pd.DataFrame({
+        "scheduled_date": usdm.pd.to_datetime(["2023-12-26", "2023-12-19"]),
+        "map_date": usdm.pd.to_datetime(["2023-12-27", None]),
+    })
+    mocker.patch("droughtmonitor.usdm.load_map_date_overrides", return_value=overrides)
+    calendar = usdm.map_date_calendar(now)
+    assert usdm.pd.Timestamp("2023-12-27") in calendar.values
+    assert usdm.pd.Timestamp("2023-12-26") not in calendar.values
+    assert usdm.pd.Timestamp("2023-12-19") not in calendar.values
+
+
+def test_fips_lookup():
+    """Test the precomputed FIPS lookup against the FIPS code table."""
+
+    fips_codes = usdm.load_fips_codes()
+    lookup = usdm.get_default_fips_lookup()
+    assert usdm.get_default_fips_lookup() is lookup  # built once
+
+    assert lookup.state_codes["CA"] == "06"
+    assert lookup.state_abbs_by_code[6] == "CA"
+    assert lookup.county_info["06001"] == ("Alameda County", "06", "CA")
+    assert len(lookup.county_info) == len(fips_codes)
+    assert lookup.counties_by_state["06"] == tuple(
+        fips_codes.loc[fips_codes["state"] == "CA", "full_fips"])
+
+    # the lookups can not be modified
+    with pytest.raises(TypeError):
+        lookup.state_codes["XX"] = "99"
+
+    # a DataFrame can still be passed to the helper functions
+    subset = fips_codes[fips_codes["state"] == "DE"]
+    assert usdm.get_all_states(subset) == ["DE"]
+    assert usdm.convert_state_code("10", fips_codes=subset) == "DE"
+    with pytest.raises(ValueError):
+        usdm.convert_state_code("CA", fips_codes=subset)
+
+
+def test_import_is_lazy():
+    """Test that importing the module does not load geopandas, tqdm or the
+    FIPS code table."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys\n"
+        "from droughtmonitor import usdm\n"
+        "assert 'geopandas' not in sys.modules\n"
+        "assert 'tqdm' not in sys.modules\n"
+        "assert 'asyncio' not in sys.modules\n"
+        "assert usdm.read_fips_codes.cache_info().currsize == 0\n"
+        "usdm.valid_geography('CA'); usdm.get_counties_in_state('TX')\n"
+        "assert usdm.read_fips_codes.cache_info().misses == 1\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_combine_comp_stats_matches_merge():
+    """Test that the index aligned join gives the same result as chained
+    outer merges."""
+    import pandas as pd
+
+    dates = pd.date_range("2020-01-07", periods=6, freq="7D")[::-1]
+
+    def stat_frame(label, n, extra=True):
+        df = pd.DataFrame({
+            "mapDate": dates.strftime("%Y-%m-%dT00:00:00")[:n],
+            "stateAbbreviation": "VA",
+            f"NONE_{label}": range(n),
+            f"D0_{label}": [float(i) / 2 for i in range(n)],
+            "mapStartDate": dates.strftime("%Y-%m-%dT00:00:00")[:n],
+            "mapEndDate": (dates + pd.Timedelta(days=6)).strftime("%Y-%m-%dT23:59:59")[:n],
+        })
+        if extra:
+            df["statisticFormatID"] = 1
+        return df
+
+    # the DSCI frame is missing the oldest week and has its rows reversed
+    frames = [stat_frame("Area", 6), stat_frame("AreaPercent", 6),
+              stat_frame("DSCI", 5, extra=False).iloc[::-1]]
+
+    expected = frames[0]
+    for df in frames[1:]:
+        expected = expected.merge(df, how="outer")
+
+    pd.testing.assert_frame_equal(usdm.combine_comp_stats(frames), expected)
+    assert usdm.combine_comp_stats(frames[:1]) is frames[0]
+
+    # frames covering the same map dates in the same order
+    aligned = [stat_frame("Area", 6), stat_frame("DSCI", 6)]
+    pd.testing.assert_frame_equal(usdm.combine_comp_stats(aligned),
+                                  aligned[0].merge(aligned[1], how="outer"))
+
+
+def test_add_geography_identifiers(mocker):
+    """Test that identifiers are added for every grouping mode."""
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = [{"mapDate": "2020-01-07", "d0": 100}]
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 side_effect=lambda state, *args, **kwargs: {"CA": ["06001"], "OR": ["41001"]}[state])
+
+    result = usdm.USDM(geography=["CA", "OR"], group_by="county",
+                       time_period=[2020], confirm=False).get_comp_stats(stat=["Area"])
+    assert list(result.columns[-4:]) == ["county_fips", "county_name",
+                                         "state_code", "state_name"]
+    assert result[["county_fips", "county_name", "state_code", "state_name"]].values.tolist() == [
+        ["06001", "Alameda County", "06", "CA"],
+        ["41001", "Baker County", "41", "OR"],
+    ]
+
+    # list of states without grouping
+    result = usdm.USDM(geography=["CA", "OR"],
+                       time_period=[2020]).get_comp_stats(stat=["Area"])
+    assert list(result.columns[-2:]) == ["state_code", "state_name"]
+    assert result[["state_code", "state_name"]].values.tolist() == [["06", "CA"], ["41", "OR"]]
+
+    # no identifiers for a single geography
+    result = usdm.USDM(geography="CA", time_period=[2020]).get_comp_stats(stat=["Area"])
+    assert "state_code" not in result.columns
+
+
+def test_iter_comp_stats(mocker):
+    """Test that iter_comp_stats yields chunks that add up to get_comp_stats."""
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=county_get(mocker, d1=1.0))
+    mock_counties = ["06001", "06003", "06005", "06007", "06009"]
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=mock_counties)
+
+    drought_obj = usdm.USDM(geography="CA", group_by="county",
+                            time_period=[2020], confirm=False)
+    expected = drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0])
+
+    chunks = list(drought_obj.iter_comp_stats(stat=["Area"], drought_threshold=[0],
+                                              batch_size=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert all("D1_Area" not in c.columns for c in chunks)
+    usdm.pd.testing.assert_frame_equal(
+        usdm.pd.concat(chunks, ignore_index=True), expected)
+
+    # only a bounded number of requests are made ahead of the consumer
+    mock_get.reset_mock()
+    chunk_iter = drought_obj.iter_comp_stats(stat=["Area"])
+    first = next(chunk_iter)
+    assert list(first["county_fips"]) == ["06001"]
+    assert mock_get.call_count <= 3
+    chunk_iter.close()
+
+    with pytest.raises(ValueError, match="batch_size must be a positive integer"):
+        next(drought_obj.iter_comp_stats(batch_size=0))
+
+
+def test_get_comp_stats_parquet_output(mocker, tmp_path):
+    """Test that get_comp_stats writes a partitioned Parquet dataset."""
+    pytest.importorskip("pyarrow")
+
+    mocker.patch("requests.Session.get", side_effect=county_get(mocker, years=(2020, 2021)))
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=["06001", "06003"])
+
+    drought_obj = usdm.USDM(geography="CA", group_by="county",
+                            time_period=[2020, 2021], confirm=False)
+    expected = drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0])
+
+    output = tmp_path / "ca_counties"
+    assert drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0],
+                                      output=output) == output
+    assert (output / "state_code=06" / "year=2021").is_dir()
+
+    # nothing is written when the user cancels the query
+    mocker.patch("builtins.input", return_value="n")
+    cancelled = usdm.USDM(geography="CA", group_by="county", time_period=[2020, 2021],
+                          confirm_threshold=1)
+    assert cancelled.get_comp_stats(stat=["Area"], output=tmp_path / "cancelled") is None
+    assert not (tmp_path / "cancelled").exists()
+
+    result = usdm.read_parquet(output)
+    assert result["county_fips"].astype(str).str.len().eq(5).all()
+    assert result["state_code"].astype(str).eq("06").all()
+    result = result[expected.columns].astype(
+        {c: str for c in ["county_fips", "county_name", "state_code", "state_name"]})
+    for c in ["mapDate", "mapStartDate", "mapEndDate"]:
+        result[c] = usdm.pd.to_datetime(result[c]).dt.date
+    result = result.sort_values(["county_fips", "mapDate"], ignore_index=True)
+    expected = expected.sort_values(["county_fips", "mapDate"], ignore_index=True)
+    usdm.pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_get_comp_stats_checkpoint_resume(mocker, tmp_path):
+    """Test that a failed query resumes from its checkpoint."""
+
+    fetched = []
+    fail_on = {"06005"}
+
+    mocker.patch("requests.Session.get", side_effect=county_get(
+        mocker, status=lambda county, url: 503 if county in fail_on else None,
+        fetched=fetched))
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=["06001", "06003", "06005", "06007"])
+
+    checkpoint = tmp_path / "job.checkpoint"
+    drought_obj = usdm.USDM(geography="CA", group_by="county", time_period=[2020],
+                            confirm=False, checkpoint=checkpoint,
+                            retry=usdm.RetryPolicy(max_attempts=1))
+    with pytest.raises(Exception, match="503"):
+        drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0])
+    drought_obj.close()
+    # requests made ahead of the failure are recorded too
+    completed_before = list(fetched)
+    assert completed_before[:2] == ["06001", "06003"]
+
+    # the rerun only requests the units that did not complete
+    fail_on.clear()
+    fetched.clear()
+    with usdm.USDM(geography="CA", group_by="county", time_period=[2020],
+                   confirm=False, checkpoint=checkpoint) as drought_obj:
+        result = drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0])
+        completed = drought_obj.checkpoint.completed()
+    assert fetched == [c for c in ["06005", "06007"] if c not in completed_before]
+    assert list(result["county_fips"]) == ["06001", "06003", "06005", "06007"]
+    assert list(result["D0_Area"]) == [6001.0, 6003.0, 6005.0, 6007.0]
+    assert sorted(completed["geography"]) == ["06001", "06003", "06005", "06007"]
+    assert set(completed["stat"]) == {"GetDroughtSeverityStatisticsByArea"}
+
+    # units that could include an unreleased map are requested again once
+    # they expire
+    mocker.patch("droughtmonitor.usdm.cache_expiry", return_value=usdm.time.time() - 1)
+    expired = tmp_path / "expired.checkpoint"
+    for _ in range(2):
+        fetched.clear()
+        with usdm.USDM(geography="CA", group_by="county", time_period=[2020],
+                       confirm=False, checkpoint=expired) as drought_obj:
+            drought_obj.get_comp_stats(stat=["Area"], drought_threshold=[0])
+            assert len(drought_obj.checkpoint) == 0
+        assert fetched == ["06001", "06003", "06005", "06007"]
+
+
+def test_fetch_retries_transient_errors(mocker):
+    """Test that fetch retries 429/5xx responses and connection errors."""
+    sleep = mocker.patch("droughtmonitor.usdm.time.sleep")
+    url = "https://usdmdataservices.unl.edu/api/USStatistics/GetDSCI?aoi=US"
+
+    def response(status_code, headers={}):
+        r = mocker.Mock()
+        r.status_code = status_code
+        r.headers = headers
+        return r
+
+    ok = response(200)
+    mocker.patch("requests.Session.get", side_effect=[
+        response(429, {"Retry-After": "7"}),
+        usdm.requests.ConnectionError(),
+        response(503),
+        ok,
+    ])
+    retry = usdm.RetryPolicy(max_attempts=4, backoff=2, jitter=False)
+    limiter = mocker.Mock()
+    assert usdm.fetch(url, retry=retry, rate_limiter=limiter) is ok
+    limiter.throttle.assert_called_once()
+    assert [c.args[0] for c in sleep.call_args_list] == [7.0, 4, 8]
+
+    # errors that are not transient, or persist, raise a typed exception
+    mock_get = mocker.patch("requests.Session.get", return_value=response(404))
+    with pytest.raises(usdm.HTTPStatusError) as error:
+        usdm.fetch(url, retry=retry)
+    assert mock_get.call_count == 1
+    assert (error.value.url, error.value.status_code) == (url, 404)
+
+    mock_get = mocker.patch("requests.Session.get",
+                            return_value=response(503, {"Retry-After": "1"}))
+    with pytest.raises(usdm.USDMError, match="HTTP status code: 503") as error:
+        usdm.fetch(url, retry=retry)
+    assert mock_get.call_count == 4
+    assert error.value.retry_after == 1.0
+
+    assert usdm.parse_retry_after(
+        "Wed, 21 Oct 2026 07:28:30 GMT",
+        now=usdm.datetime(2026, 10, 21, 7, 28, tzinfo=usdm.timezone.utc)) == 30.0
+
+
+def test_rate_limiter(mocker):
+    """Test the token bucket rate limiter and duration estimates."""
+    clock = [0.0]
+    mocker.patch("droughtmonitor.usdm.time.monotonic", side_effect=lambda: clock[0])
+    sleep = mocker.patch("droughtmonitor.usdm.time.sleep",
+                         side_effect=lambda s: clock.__setitem__(0, clock[0] + s))
+
+    # a burst of 2, then one request every 1/2 second
+    limiter = usdm.RateLimiter(rate=2, burst=2)
+    for _ in range(4):
+        limiter.acquire()
+    assert [c.args[0] for c in sleep.call_args_list] == [0.5, 0.5]
+
+    # 429s halve the rate, successes recover it up to the configured rate
+    limiter.throttle()
+    assert limiter.current_rate == 1
+    # a burst of 429s from requests already in flight halves it once
+    limiter.throttle()
+    limiter.throttle()
+    assert limiter.current_rate == 1
+    clock[0] += 1
+    limiter.throttle()
+    assert limiter.current_rate == limiter.min_rate
+    for _ in range(100):
+        limiter.recover()
+    assert limiter.min_rate < limiter.current_rate <= 2
+    for _ in range(1000):
+        limiter.recover()
+    assert limiter.current_rate == 2
+
+    # without a limit, a 429 starts limiting at half the observed rate
+    unlimited = usdm.RateLimiter()
+    for _ in range(11):
+        unlimited.acquire()
+        clock[0] += 0.1
+    assert unlimited.current_rate is None
+    unlimited.throttle()
+    assert unlimited.current_rate == pytest.approx(5)
+
+    # the estimated duration is limited by the workers or the rate
+    assert usdm.estimate_duration(100, max_workers=1, rate=None, latency=0.5) == 50
+    assert usdm.estimate_duration(100, max_workers=10, rate=None, latency=0.5) == 5
+    assert usdm.estimate_duration(100, max_workers=10, rate=4, latency=0.5) == 25
+    assert usdm.format_duration(25) == "25 seconds"
+    assert usdm.format_duration(3600) == "60 minutes"
+
+    prompt = mocker.patch("builtins.input", return_value="y")
+    assert usdm.prompt_user_confirmation(1000, duration=3 * 3600)
+    assert "1000 API calls and take about 3.0 hours" in prompt.call_args.args[0]
+
+
+def test_get_comp_stats_collect_errors(mocker):
+    """Test that on_error='collect' keeps the geographies that succeeded."""
+    failing = {"06003"}
+
+    mocker.patch("requests.Session.get", side_effect=county_get(
+        mocker, status=lambda county, url: 404 if county in failing and "DSCI" in url else None,
+        dsci=1))
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=["06001", "06003", "06005"])
+
+    drought_obj = usdm.USDM(geography="CA", group_by="county", time_period=[2020],
+                            confirm=False, max_workers=2)
+    with pytest.raises(usdm.HTTPStatusError):
+        drought_obj.get_comp_stats(stat=["Area", "DSCI"], drought_threshold=[0])
+
+    result = drought_obj.get_comp_stats(stat=["Area", "DSCI"], drought_threshold=[0],
+                                        on_error="collect")
+    assert list(result["county_fips"]) == ["06001", "06005"]
+    assert len(drought_obj.errors) == 1
+    error = drought_obj.errors[0]
+    assert (error.geography, error.stat, error.status_code) == ("06003", "DSCI", 404)
+    assert "aoi=06003" in error.url
+    assert isinstance(error.exception, usdm.HTTPStatusError)
+
+    # retry only the failed geographies
+    failing.clear()
+    retried = drought_obj.get_comp_stats(
+        stat=["Area", "DSCI"], drought_threshold=[0],
+        geographies=usdm.failed_geographies(drought_obj.errors))
+    assert list(retried["county_fips"]) == ["06003"]
+    assert retried["county_name"].notna().all()
+    assert drought_obj.errors == []
+
+    with pytest.raises(ValueError, match="on_error"):
+        drought_obj.get_comp_stats(on_error="ignore")
+
+    # AsyncUSDM collects and retries the same way
+    import asyncio
+    failing.add("06003")
+    async_obj = usdm.AsyncUSDM(geography="CA", group_by="county", time_period=[2020],
+                               confirm=False)
+    with pytest.raises(usdm.HTTPStatusError):
+        asyncio.run(async_obj.get_comp_stats(stat=["Area", "DSCI"], drought_threshold=[0]))
+
+    async_result = asyncio.run(async_obj.get_comp_stats(
+        stat=["Area", "DSCI"], drought_threshold=[0], on_error="collect"))
+    usdm.pd.testing.assert_frame_equal(async_result, result)
+    assert [(e.geography, e.stat, e.status_code) for e in async_obj.errors] == [
+        ("06003", "DSCI", 404)]
+
+    failing.clear()
+    async_retried = asyncio.run(async_obj.get_comp_stats(
+        stat=["Area", "DSCI"], drought_threshold=[0],
+        geographies=usdm.failed_geographies(async_obj.errors)))
+    usdm.pd.testing.assert_frame_equal(async_retried, retried)
+    assert async_obj.errors == []
+
+
+def test_compact_dtypes(mocker):
+    """Test compact=True returns datetime64, categorical and downcast columns."""
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = [{
+        "mapDate": f"2020-01-{day:02d}T00:00:00",
+        "validStart": f"2020-01-{day:02d}T00:00:00",
+        "validEnd": f"2020-01-{day + 6:02d}T23:59:59",
+        "d0": 12.5,
+    } for day in (7, 14)]
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=["06001", "06003"])
+
+    kwargs = dict(geography="CA", group_by="county", time_period=[2020], confirm=False)
+    legacy = usdm.USDM(**kwargs).get_comp_stats(stat=["Area", "AreaPercent"],
+                                                drought_threshold=[0])
+    compact = usdm.USDM(compact=True, **kwargs).get_comp_stats(
+        stat=["Area", "AreaPercent"], drought_threshold=[0])
+
+    assert compact["mapDate"].dtype == "datetime64[s]"
+    assert compact["mapEndDate"].iloc[0] == usdm.pd.Timestamp("2020-01-13")
+    assert all(compact[c].dtype == "category"
+               for c in ["county_fips", "county_name", "state_code", "state_name"])
+    assert compact["D0_AreaPercent"].dtype == "float32"
+    assert compact["D0_Area"].dtype == "float64"
+    assert list(compact["mapDate"].dt.date) == list(legacy["mapDate"])
+    assert list(compact["county_fips"]) == list(legacy["county_fips"])
+
+    # measure the memory saved on a larger (100 county, 10 year) result
+    dates = usdm.pd.date_range("2010-01-05", periods=520, freq="7D")
+    counties = sorted(usdm.get_default_fips_lookup().county_info)[:100]
+    n = len(dates) * len(counties)
+    df = usdm.pd.DataFrame({
+        "mapDate": usdm.np.tile(dates.strftime("%Y-%m-%dT00:00:00"), len(counties)),
+        "county_fips": usdm.np.repeat(counties, len(dates)),
+        "D0_AreaPercent": usdm.np.linspace(0, 100, n),
+        "DSCI": usdm.np.arange(n) % 500,
+    })
+    df = usdm.add_geography_identifiers(df, "county_fips")
+    legacy_bytes = usdm.clean_date_columns(df.copy()).memory_usage(deep=True).sum()
+    compact_bytes = usdm.compact_dtypes(df.copy()).memory_usage(deep=True).sum()
+    assert compact_bytes * 3 < legacy_bytes
+
+
+def test_drought_threshold_push_down(mocker):
+    """Test that unrequested drought levels are dropped from each response."""
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = [{
+        "mapDate": "2020-01-07T00:00:00", "none": 1.0, "d0": 2.0, "d1": 3.0,
+        "d2": 4.0, "d3": 5.0, "d4": 6.0,
+    }]
+    mock_response.content = json.dumps(mock_response.json.return_value).encode()
+    mocker.patch("requests.Session.get", return_value=mock_response)
+    mocker.patch("droughtmonitor.usdm.get_counties_in_state",
+                 return_value=["06001", "06003"])
+    combine = mocker.spy(usdm, "combine_comp_stats")
+
+    drought_obj = usdm.USDM(geography="CA", group_by="county", time_period=[2020],
+                            confirm=False)
+    result = drought_obj.get_comp_stats(stat=["Area", "Population"], drought_threshold=[2])
+
+    merged_columns = {c for call in combine.call_args_list
+                      for frame in call.args[0] for c in frame.columns}
+    assert {"D2_Area", "D2_Population"} <= merged_columns
+    assert not any(f"D{d}" in c for c in merged_columns for d in [0, 1, 3, 4])
+    assert list(result["D2_Population"]) == [4.0, 4.0]
+
+    assert usdm.drought_level_columns(["mapDate", "D0_Area", "D2_Area"], [2]) == \
+        ["mapDate", "D2_Area"]
+    assert usdm.drought_level_columns(["D0_Area"], None) == ["D0_Area"]
+
+
+def test_records_to_frame(mocker):
+    """Test columnar parsing of USDM responses with either JSON decoder."""
+    content = json.dumps([
+        {"mapDate": "2020-01-07T00:00:00", "fips": "06001", "none": 10, "d0": 90},
+        {"mapDate": "2020-01-14T00:00:00", "fips": "06001", "none": None, "d0": 85.5,
+         "d1": 2},
+    ]).encode()
+
+    usdm.json_decoder.cache_clear()
+    mocker.patch.dict("sys.modules", {"orjson": None})
+    assert usdm.json_decoder() is json.loads
+    usdm.json_decoder.cache_clear()
+
+    records = usdm.json_loads(content)
+    assert usdm.record_fields(records) == ["mapDate", "fips", "none", "d0", "d1"]
+
+    df = usdm.records_to_frame(records)
+    expected = usdm.pd.DataFrame(records)
+    expected[["none", "d0", "d1"]] = expected[["none", "d0", "d1"]].astype("float64")
+    usdm.pd.testing.assert_frame_equal(df, expected)
+    assert df["d0"].dtype == "float64"
+
+    assert list(usdm.records_to_frame(records, ["mapDate"]).columns) == ["mapDate"]
+    assert usdm.records_to_frame([]).empty
+
+
+def test_csv_transport_matches_json(mocker):
+    """Test that transport='csv' returns the same statistics as JSON."""
+    records = [{
+        "mapDate": f"2020-01-{day:02d}T00:00:00",
+        "fips": "06001",
+        "county": "Alameda County",
+        "state": "CA",
+        "none": 10.0,
+        "d0": 90.0,
+        "d1": 45.5,
+        "validStart": f"2020-01-{day:02d}T00:00:00",
+        "validEnd": f"2020-01-{day + 6:02d}T23:59:59",
+        "statisticFormatID": 1,
+    } for day in (7, 14)]
+    csv = usdm.pd.DataFrame(records).rename(columns={
+        "mapDate": "MapDate", "fips": "FIPS", "county": "County", "state": "State",
+        "none": "None", "d0": "D0", "d1": "D1", "validStart": "ValidStart",
+        "validEnd": "ValidEnd", "statisticFormatID": "StatisticFormatID",
+    }).to_csv(index=False).encode()
+
+    def fake_get(url, headers=None, **kwargs):
+        response = mocker.Mock()
+        response.status_code = 200
+        response.content = csv if headers["Accept"] == "text/csv" else json.dumps(records).encode()
+        return response
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=fake_get)
+
+    kwargs = dict(geography="06001", time_period=[2020])
+    expected = usdm.USDM(**kwargs).get_comp_stats(stat=["Area", "DSCI"], drought_threshold=[1])
+    result = usdm.USDM(transport="csv", **kwargs).get_comp_stats(
+        stat=["Area", "DSCI"], drought_threshold=[1])
+    assert mock_get.call_args.kwargs["headers"] == {"Accept": "text/csv"}
+    assert result["fips"].iloc[0] == "06001"
+    usdm.pd.testing.assert_frame_equal(result, expected)
+
+    # the transport is chosen per endpoint
+    drought_obj = usdm.USDM(transport={"comp_stats": "csv"}, **kwargs)
+    assert drought_obj.transport == {"comp_stats": "csv", "weeks_in_drought": "json"}
+    with pytest.raises(ValueError, match="transport"):
+        usdm.USDM(transport="xml", **kwargs)
+    assert [usdm.normalize_csv_header(n) for n in ["FIPS", "D0", "MapDate", "DSCI"]] == \
+        ["fips", "d0", "mapDate", "dsci"]
+
+
+def test_shard_time_windows(mocker):
+    """Test that sharded queries are stitched into the unsharded result."""
+    weeks = usdm.pd.date_range("2019-01-01", "2021-12-28", freq="7D")
+
+    def fake_get(url, headers=None, **kwargs):
+        params = dict(usdm.parse_qsl(usdm.urlsplit(url).query))
+        start = usdm.pd.to_datetime(params["startdate"])
+        end = usdm.pd.to_datetime(params["enddate"])
+        # include the week before the window, like an overlapping response
+        in_window = weeks[(weeks >= start - usdm.timedelta(days=7)) & (weeks <= end)]
+        content = [{
+            "mapDate": w.strftime("%Y-%m-%dT00:00:00"),
+            "validStart": w.strftime("%Y-%m-%dT00:00:00"),
+            "validEnd": (w + usdm.timedelta(days=6)).strftime("%Y-%m-%dT23:59:59"),
+            "d0": float(w.dayofyear),
+        } for w in in_window[::-1]]
+        response = mocker.Mock()
+        response.status_code = 200
+        response.content = json.dumps(content).encode()
+        return response
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=fake_get)
+
+    expected = usdm.USDM(geography="US", time_period=["01/01/2019", "12/31/2021"]).get_comp_stats(
+        stat=["Area", "AreaPercent"], drought_threshold=[0])
+    assert mock_get.call_count == 2
+
+    mock_get.reset_mock()
+    sharded = usdm.USDM(geography="US", time_period=["01/01/2019", "12/31/2021"],
+                        shard="year", max_workers=3)
+    result = sharded.get_comp_stats(stat=["Area", "AreaPercent"], drought_threshold=[0])
+    assert mock_get.call_count == 2 * 3
+    windows = [dict(usdm.parse_qsl(usdm.urlsplit(c.args[0]).query))["enddate"]
+               for c in mock_get.call_args_list[:3]]
+    assert windows == ["01/06/2020", "01/04/2021", "12/31/2021"]
+
+    # boundary weeks returned by two windows appear once
+    usdm.pd.testing.assert_frame_equal(result, expected)
+
+    assert usdm.date_windows("01/01/2021", "03/31/2021", 4)[:2] == [
+        ("01/01/2021", "02/01/2021"), ("02/02/2021", "03/01/2021")]
+    with pytest.raises(ValueError, match="shard"):
+        usdm.USDM(geography="US", time_period=[2020], shard="month")
+
+
+def test_get_spatial_data_parallel(mocker):
+    """Test concurrent map downloads with parsing in a process pool."""
+    import geopandas as gpd
+
+    def fake_get(url, headers=None, **kwargs):
+        map_date = url.split("usdm_")[1].split(".json")[0]
+        geojson = {"type": "FeatureCollection", "features": [{
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [-100.0, 40.0]},
+            "properties": {"DM": int(map_date[-2:]) % 5},
+        }]}
+        response = mocker.Mock()
+        response.status_code = 200
+        response.content = json.dumps(geojson).encode()
+        return response
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=fake_get)
+    drought_object = usdm.USDM(geography="TOTAL", time_period=["01/01/2020", "02/29/2020"],
+                               max_workers=3)
+    map_dates = drought_object._spatial_map_dates()
+    labels = [f"{m[4:6]}/{m[6:8]}/{m[0:4]}" for m in map_dates]
+
+    pool = mocker.spy(usdm, "ProcessPoolExecutor")
+    result = drought_object.get_spatial_data(processes=2, max_pending=3)
+    assert list(result) == labels
+    # workers are not forked from the multi-threaded downloader
+    assert pool.call_args.kwargs["mp_context"].get_start_method() != "fork"
+    assert all(isinstance(gdf, gpd.GeoDataFrame) for gdf in result.values())
+    assert [gdf["DM"].iloc[0] for gdf in result.values()] == \
+        [int(m[-2:]) % 5 for m in map_dates]
+    assert mock_get.call_count == len(map_dates)
+
+    json_result = drought_object.get_spatial_data(format="json")
+    assert list(json_result) == labels
+    assert json_result[labels[0]]["features"][0]["properties"]["DM"] == int(map_dates[0][-2:]) % 5
+
+    # only max_pending maps are fetched ahead of the consumer
+    mock_get.reset_mock()
+    maps = drought_object._fetch_maps(map_dates, "json", max_pending=2)
+    next(maps)
+    assert mock_get.call_count <= 3
+    maps.close()
+
+
+def test_iter_spatial_data(mocker):
+    """Test that iter_spatial_data yields maps lazily in chronological order."""
+
+    def fake_get(url, headers=None, **kwargs):
+        response = mocker.Mock()
+        response.status_code = 200
+        response.content = json.dumps({"type": "FeatureCollection", "features": [],
+                                       "url": url}).encode()
+        return response
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=fake_get)
+    drought_object = usdm.USDM(geography="TOTAL", time_period=["01/01/2020", "03/31/2020"])
+
+    maps = drought_object.iter_spatial_data(format="json", max_pending=1)
+    map_date, data = next(maps)
+    assert map_date == "12/31/2019"
+    assert data["url"].endswith("usdm_20191231.json")
+    assert mock_get.call_count <= 2
+    maps.close()
+
+    pairs = list(drought_object.iter_spatial_data(format="json"))
+    dates = [usdm.pd.to_datetime(d) for d, _ in pairs]
+    assert dates == sorted(dates) and len(dates) == 14
+    assert dict(pairs) == drought_object.get_spatial_data(format="json")
+
+
+def test_map_store(mocker, tmp_path):
+    """Test that maps are stored as GeoParquet and read back without downloads."""
+    pytest.importorskip("pyarrow")
+
+    def fake_get(url, headers=None, **kwargs):
+        geojson = {"type": "FeatureCollection", "features": [{
+            "type": "Feature",
+            "geometry": {"type": "Polygon",
+                         "coordinates": [[[-100, 40], [-99, 40], [-99, 41], [-100, 40]]]},
+            "properties": {"DM": 2},
+        }]}
+        response = mocker.Mock()
+        response.status_code = 200
+        response.content = json.dumps(geojson).encode()
+        return response
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=fake_get)
+    kwargs = dict(geography="TOTAL", time_period=["01/01/2020", "01/31/2020"])
+
+    drought_object = usdm.USDM(map_store=tmp_path / "maps", **kwargs)
+    downloaded = drought_object.get_spatial_data()
+    assert mock_get.call_count == len(downloaded) == 5
+    assert drought_object.map_store.map_dates() == [
+        "20191231", "20200107", "20200114", "20200121", "20200128"]
+    assert (tmp_path / "maps" / "map_date=20200107" / "usdm.parquet").exists()
+
+    # a new object reads the stored maps instead of downloading them
+    mock_get.reset_mock()
+    stored = usdm.USDM(map_store=usdm.MapStore(tmp_path / "maps"), **kwargs).get_spatial_data()
+    mock_get.assert_not_called()
+    assert list(stored) == list(downloaded)
+    for map_date, gdf in stored.items():
+        assert gdf.geom_equals(downloaded[map_date]).all()
+        assert list(gdf["DM"]) == [2]
+
+    # json is always downloaded
+    usdm.USDM(map_store=tmp_path / "maps", **kwargs).get_spatial_data(format="json")
+    assert mock_get.call_count == 5
+
+    # AsyncUSDM reads the same store
+    import asyncio
+    mock_get.reset_mock()
+    stored = asyncio.run(usdm.AsyncUSDM(map_store=tmp_path / "maps", **kwargs).get_spatial_data())
+    mock_get.assert_not_called()
+    assert list(stored) == list(downloaded)
+
+    drought_object.map_store.clear()
+    assert drought_object.map_store.map_dates() == []
+
+    # and adds the maps it downloads
+    async_object = usdm.AsyncUSDM(map_store=tmp_path / "maps", **kwargs)
+    asyncio.run(async_object.get_spatial_data())
+    assert mock_get.call_count == 5
+    assert len(async_object.map_store.map_dates()) == 5
+    async_object.map_store.clear()
@@ -1,62 +1,1006 @@
+import csv
+import io
+import json
 import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import warnings
+import numpy as np
 import pandas as pd
-import geopandas as gpd
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import requests
+from requests.adapters import HTTPAdapter
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from functools import lru_cache
-from tqdm import tqdm
+from types import MappingProxyType
 
 
-def check_status_code(status_code):
+class USDMError(Exception):
+    """
+    Base class for errors raised by droughtmonitor.
+    """
+
+
+class HTTPStatusError(USDMError):
+    """
+    Raised when a USDM API request returns a status code other than 200.
+
+    Attributes:
+    -----------
+    url : str or None
+        The requested url.
+    status_code : int
+        The HTTP status code of the response.
+    retry_after : float or None
+        Seconds the server asked to wait before retrying (Retry-After
+        header), if it sent one.
+    """
+
+    def __init__(self, status_code, url=None, retry_after=None):
+        message = f"HTTP status code: {status_code}"
+        if url is not None:
+            message += f" ({url})"
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+        self.retry_after = retry_after
+
+
+def check_status_code(status_code, url=None, retry_after=None):
     """
     Checks if the provided HTTP status code is 200 (OK).
    
     Args:
     status_code (int): The HTTP status code to check.
+    url (str, optional): The requested url, included in the error.
+    retry_after (float, optional): The response's Retry-After delay.
    
-    Exception: If the status code is not 200, an exception 
-    is raised with the status code.
+    HTTPStatusError: If the status code is not 200, an exception 
+    is raised with the status code and url.
     """
     if status_code != 200:
-        raise Exception(f"HTTP status code: {status_code}")
+        raise HTTPStatusError(status_code, url, retry_after)
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parse a Retry-After header (seconds or an HTTP date) into a number of
+    seconds to wait. Returns None if the value is missing or invalid.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((retry_at - now).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """
+    How fetch retries requests that fail with a transient error: a
+    connection error, a timeout, or one of status_codes.
+
+    Failed attempts wait an exponentially increasing delay (backoff,
+    2 * backoff, 4 * backoff, ... up to max_backoff) before retrying. With
+    jitter the delay is drawn uniformly between 0 and that value, so many
+    workers do not retry at the same moment. A Retry-After header sent with
+    the response is honored instead of the computed delay.
+
+    Parameters:
+    -----------
+    max_attempts : int
+        Total number of attempts, including the first (default 5). Use 1 to
+        disable retries.
+    backoff : float
+        Delay in seconds before the first retry (default 0.5).
+    max_backoff : float
+        Largest delay in seconds between attempts (default 60).
+    jitter : bool
+        Randomize the delays (default True).
+    status_codes : tuple of int
+        Status codes that are retried (default 429, 502, 503 and 504).
+
+    Examples:
+    ---------
+    usdm = USDM(geography="US", group_by="county", time_period=[2020],
+                retry=RetryPolicy(max_attempts=8, backoff=1))
+    """
+
+    def __init__(self, max_attempts=5, backoff=0.5, max_backoff=60, jitter=True,
+                 status_codes=(429, 502, 503, 504)):
+        if not isinstance(max_attempts, int) or max_attempts < 1:
+            raise ValueError("max_attempts must be a positive integer")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = frozenset(status_codes)
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait after failed attempt number attempt (starting at 1).
+        """
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+DEFAULT_RETRY = RetryPolicy()
+
+
+class RateLimiter:
+    """
+    A thread safe token bucket limiting how many requests per second are
+    sent. fetch uses one limiter shared by every USDM object, thread and
+    endpoint in the process (see set_rate_limit).
+
+    When the API responds 429 (too many requests) the limiter halves its
+    rate, at most once per cooldown (the longer of 1 second and the time
+    between two requests at the halved rate) so that the 429s of requests
+    already in flight do not slow it down further. It then increases the
+    rate again by 1% per successful request up to the configured rate.
+    Without a configured rate there is no limit until the first 429, after
+    which the rate starts at half the rate requests were being sent.
+
+    Parameters:
+    -----------
+    rate : float, optional
+        Requests per second. Defaults to no limit.
+    burst : int, optional
+        Number of requests that can be sent at once after a pause. Defaults
+        to the rate (at least 1).
+    min_rate : float
+        Lowest rate the limiter slows down to (default 0.5).
+    """
+
+    # shortest time between two halvings of the rate, in seconds
+    MIN_COOLDOWN = 1.0
+
+    def __init__(self, rate=None, burst=None, min_rate=0.5):
+        self._lock = threading.Lock()
+        self.min_rate = min_rate
+        self._sent = deque(maxlen=50)
+        self.configure(rate, burst)
+
+    def configure(self, rate=None, burst=None):
+        """
+        Set the rate (requests per second, None for no limit) and burst.
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be a positive number or None")
+        with self._lock:
+            self.rate = rate
+            self.current_rate = rate
+            self.burst = burst or max(1, int(rate or 1))
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+            self._throttled = None
+
+    def acquire(self):
+        """
+        Wait until a request can be sent.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.current_rate is not None:
+                # refill, then reserve a token (possibly one not yet available)
+                elapsed = now - self._updated
+                self._tokens = min(self.burst, self._tokens + elapsed * self.current_rate)
+                self._updated = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = -self._tokens / self.current_rate
+            self._sent.append(now + wait)
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttle(self):
+        """
+        Halve the rate after a 429 response, unless it was halved less than
+        a cooldown ago.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (self._throttled is not None and now - self._throttled
+                    < max(self.MIN_COOLDOWN, 1 / self.current_rate)):
+                return
+            self._throttled = now
+
+            rate = self.current_rate
+            if rate is None:
+                # no limit yet, start from the rate requests were sent at
+                span = self._sent[-1] - self._sent[0] if len(self._sent) > 1 else 0
+                rate = (len(self._sent) - 1) / span if span > 0 else 2 * self.min_rate
+            self.current_rate = max(self.min_rate, rate / 2)
+            self._tokens = min(self._tokens, 0)
+            self._updated = now
+
+    def recover(self):
+        """
+        Increase a throttled rate by 1% after a successful response.
+        """
+        with self._lock:
+            if self.current_rate is None or self.current_rate == self.rate:
+                return
+            self.current_rate *= 1.01
+            if self.rate is not None:
+                self.current_rate = min(self.current_rate, self.rate)
+
+
+_rate_limiter = RateLimiter()
+
+
+def get_rate_limiter():
+    """
+    Return the process wide RateLimiter used by fetch.
+    """
+    return _rate_limiter
+
+
+def set_rate_limit(rate, burst=None):
+    """
+    Limit the requests per second sent to the USDM APIs by every USDM object
+    and thread in the process. Use rate=None to remove the limit.
+
+    Examples:
+    ---------
+    # at most 5 requests per second, however many workers are used
+    set_rate_limit(5)
+    usdm = USDM(geography="US", group_by="county", time_period=[2020], max_workers=16)
+    """
+    _rate_limiter.configure(rate, burst)
+
+
+def create_session(pool_size=10):
+    """
+    Create a requests Session for the USDM APIs.
+
+    The session keeps connections alive between requests and pools up to
+    pool_size connections per host, so repeated queries do not pay for a new
+    TCP/TLS handshake on every call. Responses are requested gzip compressed.
+
+    Parameters:
+    -----------
+    pool_size : int, optional
+        Maximum number of connections kept open per host (default 10).
+
+    Returns:
+    --------
+    requests.Session
+        A session with a connection pool mounted for http and https.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+@lru_cache(maxsize=None)
+def get_default_session():
+    """
+    Return the session shared by module level functions (e.g. load_map_dates)
+    when no session is supplied.
+    """
+    return create_session()
+
+
+def release_schedule(now=None):
+    """
+    Determine the most recently released USDM map and when the next map will
+    be released.
+
+    USDM maps are valid as of Tuesday and released on Thursday at 8:30 a.m.
+    Eastern time. 13:30 UTC is used as the release time since it is on or
+    after the release in both standard and daylight time.
+
+    Parameters:
+    -----------
+    now : datetime, optional
+        A timezone aware datetime to use as the current time (default is the
+        current UTC time).
+
+    Returns:
+    --------
+    tuple of (pandas.Timestamp, datetime)
+        The valid date of the latest released map and the (UTC) time of the
+        next release.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    now = now.astimezone(timezone.utc)
+
+    # most recent Thursday release at or before now
+    release = now.replace(hour=13, minute=30, second=0, microsecond=0)
+    release -= timedelta(days=(now.weekday() - 3) % 7)
+    if release > now:
+        release -= timedelta(days=7)
+
+    # the released map is valid as of the Tuesday before the release
+    latest_map = pd.Timestamp(release.date() - timedelta(days=2))
+
+    return latest_map, release + timedelta(days=7)
+
+
+def cache_expiry(url, now=None):
+    """
+    Determine how long the response to a USDM url can be cached.
+
+    Maps and statistics only change when a new map is released, so responses
+    for map files that have been released and for queries whose enddate is
+    before the next (unreleased) map date never expire. Anything that could
+    still include an unreleased map expires at the next Thursday release.
+
+    Parameters:
+    -----------
+    url : str
+        The requested url.
+    now : datetime, optional
+        A timezone aware datetime to use as the current time.
+
+    Returns:
+    --------
+    float or None
+        The expiry time as a POSIX timestamp, or None if the response never
+        expires.
+    """
+    latest_map, next_release = release_schedule(now)
+
+    # map downloads (usdm_YYYYMMDD.json)
+    map_file = re.search(r"usdm_(\d{8})\.json", url)
+    if map_file:
+        if pd.Timestamp(map_file.group(1)) <= latest_map:
+            return None
+        return next_release.timestamp()
+
+    # statistics queries with an end date
+    params = {k.lower(): v for k, v in parse_qsl(urlsplit(url).query)}
+    if "enddate" in params:
+        # valid_dates leaves the format of the user's dates, e.g. 12/31/2023
+        # or 2023/12/31
+        try:
+            end_date = pd.to_datetime(params["enddate"])
+        except (ValueError, TypeError):
+            return next_release.timestamp()
+        if end_date < latest_map + timedelta(days=7):
+            return None
+
+    return next_release.timestamp()
+
+
+def normalize_url(url):
+    """
+    Normalize a url so equivalent USDM queries share a cache key: the scheme
+    and host are lowercased and the query parameters are lowercased and
+    sorted.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted((k.lower(), v) for k, v in parse_qsl(parts.query)),
+                      safe="/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path, query, ""))
+
+
+@lru_cache(maxsize=None)
+def json_decoder():
+    """
+    Return the fastest available JSON decoder: orjson.loads if orjson is
+    installed, otherwise json.loads.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def json_loads(content):
+    """
+    Decode a JSON response body (bytes or str) with json_decoder().
+    """
+    return json_decoder()(content)
+
+
+# dtypes of the known numeric fields of the USDM statistics responses
+# (percent of area/population or area/population in each drought level);
+# other fields are inferred by pandas
+RESPONSE_DTYPES = {
+    "none": "float64",
+    "d0": "float64",
+    "d1": "float64",
+    "d2": "float64",
+    "d3": "float64",
+    "d4": "float64",
+}
+
+
+def record_fields(records):
+    """
+    Return the field names of a list of JSON records, in the order they
+    first appear.
+    """
+    return list(dict.fromkeys(k for record in records for k in record))
+
+
+def records_to_frame(records, columns=None):
+    """
+    Build a DataFrame from a list of JSON records one column at a time, using
+    the dtypes in RESPONSE_DTYPES for the known USDM fields.
+
+    Parameters:
+    -----------
+    records : list of dict
+        The decoded response.
+    columns : list of str, optional
+        Fields to keep, defaults to every field (see record_fields).
+
+    Returns:
+    --------
+    pandas.DataFrame
+    """
+    if columns is None:
+        columns = record_fields(records)
+
+    data = {}
+    for name in columns:
+        values = [record.get(name) for record in records]
+        dtype = RESPONSE_DTYPES.get(name)
+        if dtype is not None:
+            try:
+                values = np.array(values, dtype=dtype)
+            except (TypeError, ValueError):
+                # unexpected values, let pandas infer the dtype
+                pass
+        data[name] = values
+
+    if len(data) == 0:
+        return pd.DataFrame()
+    return pd.DataFrame(data, columns=columns)
+
+
+# fields of the USDM CSV responses read as strings (FIPS codes keep their
+# leading zeros)
+CSV_STRING_FIELDS = ["fips", "county", "state", "stateAbbreviation"]
+
+
+def normalize_csv_header(name):
+    """
+    Convert a USDM CSV column name to the name used in the JSON responses:
+    all caps names are lowercased ("FIPS" -> "fips", "D0" -> "d0") and
+    other names get a lowercase first letter ("MapDate" -> "mapDate").
+    """
+    name = name.strip()
+    if name.upper() == name:
+        return name.lower()
+    return name[:1].lower() + name[1:]
+
+
+def csv_to_frame(content, select=None):
+    """
+    Parse a USDM CSV response with the pandas C parser, using the JSON field
+    names (see normalize_csv_header) and the dtypes in RESPONSE_DTYPES.
+
+    Parameters:
+    -----------
+    content : bytes
+        The response body.
+    select : callable, optional
+        Called with the field names, returns the fields to read. Defaults to
+        every field.
+
+    Returns:
+    --------
+    pandas.DataFrame
+    """
+    if len(content.strip()) == 0:
+        return pd.DataFrame()
+
+    # read the header line directly, a separate read_csv call costs more
+    # than parsing a long history
+    header = content.split(b"\n", 1)[0].decode("utf-8-sig").strip()
+    names = [normalize_csv_header(n) for n in next(csv.reader([header]))]
+    columns = names if select is None else select(names)
+
+    dtype = {n: "str" for n in CSV_STRING_FIELDS}
+    dtype.update(RESPONSE_DTYPES)
+
+    df = pd.read_csv(io.BytesIO(content), header=0, names=names, usecols=columns,
+                     dtype={n: t for n, t in dtype.items() if n in columns})
+
+    # usecols does not keep the requested order
+    if list(df.columns) != columns:
+        df = df[columns]
+    return df
+
+
+# Accept header sent for each transport (see USDM transport)
+TRANSPORTS = {
+    "json": "application/json",
+    "csv": "text/csv",
+}
+
+# endpoints whose transport can be chosen
+TRANSPORT_ENDPOINTS = ["comp_stats", "weeks_in_drought"]
+
+
+def clean_transport(transport):
+    """
+    Validate the transport argument of USDM and return the transport of
+    each endpoint as a dict.
+    """
+    if isinstance(transport, str):
+        transport = {endpoint: transport for endpoint in TRANSPORT_ENDPOINTS}
+    elif isinstance(transport, dict):
+        unknown = set(transport) - set(TRANSPORT_ENDPOINTS)
+        if unknown:
+            raise ValueError(f"transport endpoints must be in {TRANSPORT_ENDPOINTS}")
+        transport = {endpoint: transport.get(endpoint, "json")
+                     for endpoint in TRANSPORT_ENDPOINTS}
+    else:
+        raise TypeError("transport must be a string or a dict")
+
+    if any(t not in TRANSPORTS for t in transport.values()):
+        raise ValueError(f"transport must be one of {list(TRANSPORTS)}")
+    return transport
+
+
+class CachedResponse:
+    """
+    A minimal stand-in for requests.Response returned by fetch when the
+    content is read from a ResponseCache.
+    """
+
+    status_code = 200
+
+    def __init__(self, url, content):
+        self.url = url
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json_loads(self.content)
+
+
+class _SQLiteStore:
+    """
+    Base of the stores kept in a single SQLite table: ResponseCache and
+    Checkpoint. Subclasses set table and columns (the column definitions of
+    the table).
+
+    Parameters:
+    -----------
+    path : str or os.PathLike
+        The database file. It and its directory are created if they do not
+        exist.
+    """
+
+    table = None
+    columns = None
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(os.fspath(path))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # one connection shared between threads, guarded by a lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ({self.columns})")
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(f"DELETE FROM {self.table}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class ResponseCache(_SQLiteStore):
+    """
+    An on-disk cache of USDM API responses, stored in a SQLite database in
+    directory and keyed by the normalized url (and Accept header). Entries
+    expire according to cache_expiry, so historical data is kept forever and
+    data that could change expires at the next map release.
+
+    Parameters:
+    -----------
+    directory : str or os.PathLike
+        Directory holding the cache database. Created if it does not exist.
+
+    Examples:
+    ---------
+    cache = ResponseCache("~/.cache/droughtmonitor")
+    drought = USDM(geography="CA", time_period=[2020, 2021], cache=cache)
+    """
+
+    table = "responses"
+    columns = "key TEXT PRIMARY KEY, content BLOB NOT NULL, expires REAL"
+
+    def __init__(self, directory):
+        super().__init__(os.path.join(os.path.expanduser(directory), "responses.sqlite"))
+
+    @staticmethod
+    def key(url, accept=None):
+        return f"{accept or ''} {normalize_url(url)}"
+
+    def get(self, url, accept=None):
+        """
+        Return the cached content for url, or None if it is not cached or has
+        expired.
+        """
+        key = self.key(url, accept)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        content, expires = row
+        if expires is not None and expires <= datetime.now(timezone.utc).timestamp():
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        return content
+
+    def set(self, url, content, accept=None):
+        """
+        Store the content for url with an expiry determined by cache_expiry.
+        """
+        expires = cache_expiry(url)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, content, expires) VALUES (?, ?, ?)",
+                (self.key(url, accept), content, expires)
+            )
+
+
+class Checkpoint(_SQLiteStore):
+    """
+    A record of the completed units of a long running job, stored in a SQLite
+    file so an interrupted job can be resumed. Each unit is one API request
+    (a geography, statistic and date window), stored with its response so
+    completed units are not requested again when the job is rerun. Like
+    ResponseCache entries, units that could include an unreleased map
+    expire at the next map release (see cache_expiry) and are then
+    requested again.
+
+    Parameters:
+    -----------
+    path : str or os.PathLike
+        The checkpoint file. Created if it does not exist.
+
+    Examples:
+    ---------
+    # rerunning after a failure only requests the units that did not complete
+    drought = USDM(geography="US", group_by="county", time_period=[2000, 2024],
+                   checkpoint="us_counties.checkpoint")
+    comp_stats_df = drought.get_comp_stats()
+    """
+
+    table = "units"
+    columns = ("key TEXT PRIMARY KEY, geography TEXT, stat TEXT, "
+               "start_date TEXT, end_date TEXT, content BLOB NOT NULL, "
+               "completed REAL NOT NULL, expires REAL")
+
+    # units that are completed and have not expired
+    CURRENT = "(expires IS NULL OR expires > ?)"
+
+    @staticmethod
+    def unit(url):
+        """
+        Return the (geography, stat, start_date, end_date) of a request url.
+        """
+        parts = urlsplit(url)
+        params = {k.lower(): v for k, v in parse_qsl(parts.query)}
+        stat = parts.path.rsplit("/", 1)[-1]
+        return (params.get("aoi"), stat, params.get("startdate"), params.get("enddate"))
+
+    def get(self, url, accept=None):
+        """
+        Return the recorded response for url, or None if the unit has not
+        been completed or has expired.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT content FROM units WHERE key = ? AND {self.CURRENT}",
+                (ResponseCache.key(url, accept), datetime.now(timezone.utc).timestamp())
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def record(self, url, content, accept=None):
+        """
+        Record url as completed along with its response content and
+        expiry (see cache_expiry).
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (ResponseCache.key(url, accept), *self.unit(url), content,
+                 datetime.now(timezone.utc).timestamp(), cache_expiry(url))
+            )
+
+    def completed(self):
+        """
+        Return a DataFrame of the completed units (geography, stat,
+        start_date, end_date) that have not expired, in the order they were
+        completed.
+        """
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT geography, stat, start_date, end_date FROM units "
+                f"WHERE {self.CURRENT} ORDER BY completed", self._connection,
+                params=(datetime.now(timezone.utc).timestamp(),)
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT COUNT(*) FROM units WHERE {self.CURRENT}",
+                (datetime.now(timezone.utc).timestamp(),)
+            ).fetchone()[0]
+
+
+def fetch(url, session=None, headers=None, timeout=None, cache=None, retry=None,
+          rate_limiter=None):
+    """
+    Request a url from one of the USDM APIs and check the status code,
+    retrying transient failures.
+
+    Parameters:
+    -----------
+    url : str
+        The url to request.
+    session : requests.Session, optional
+        The session to send the request with. Defaults to get_default_session().
+    headers : dict, optional
+        Additional headers to send with the request.
+    timeout : float or tuple, optional
+        Timeout passed to requests (seconds, or a (connect, read) tuple).
+    cache : ResponseCache, optional
+        If supplied, the response is read from the cache when possible and
+        stored in it otherwise.
+    retry : RetryPolicy, optional
+        When and how often to retry. Defaults to DEFAULT_RETRY.
+    rate_limiter : RateLimiter, optional
+        Limiter each attempt waits on. Defaults to the process wide limiter
+        (see set_rate_limit).
+
+    Returns:
+    --------
+    requests.Response or CachedResponse
+        The response, if the status code is 200.
+
+    Raises:
+    -------
+    HTTPStatusError
+        If the status code is not 200 (after any retries).
+    requests.ConnectionError, requests.Timeout
+        If the request still fails after the last attempt.
+    """
+    if session is None:
+        session = get_default_session()
+
+    # check the cache first
+    accept = (headers or {}).get("Accept")
+    if cache is not None:
+        content = cache.get(url, accept)
+        if content is not None:
+            return CachedResponse(url, content)
+
+    if retry is None:
+        retry = DEFAULT_RETRY
+    if rate_limiter is None:
+        rate_limiter = _rate_limiter
+
+    for attempt in range(1, retry.max_attempts + 1):
+        last_attempt = attempt == retry.max_attempts
+
+        # get the data
+        rate_limiter.acquire()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if last_attempt:
+                raise
+            time.sleep(retry.delay(attempt))
+            continue
+
+        if response.status_code == 429:
+            rate_limiter.throttle()
+        elif response.status_code == 200:
+            rate_limiter.recover()
+
+        if response.status_code == 200 or response.status_code not in retry.status_codes:
+            break
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if last_attempt:
+            check_status_code(response.status_code, url, retry_after)
+        time.sleep(retry.delay(attempt, retry_after))
+
+    # check status code before continuing
+    check_status_code(response.status_code, url)
+
+    if cache is not None:
+        cache.set(url, response.content, accept)
+
+    return response
 
 
 def load_fips_codes():
     """
     Reads a CSV file containing FIPS codes that is in the 'data' folder, 
     cleans several columns,
-    and returns it as a pandas DataFrame.
+    and returns it as a pandas DataFrame. The file is only read once per
+    process; each call returns a copy.
     Returns:
       pandas.DataFrame: A DataFrame containing the FIPS codes.
     """
+    return read_fips_codes().copy()
+
+
+@lru_cache(maxsize=None)
+def read_fips_codes():
+    """
+    Read and clean the FIPS code table (see load_fips_codes). Cached, so the
+    returned DataFrame must not be modified.
+    """
     # load the fips codes
     file_path = os.path.join(os.path.dirname(__file__),
                              'data', 'fips_codes.csv')
     fips_codes = pd.read_csv(file_path)
 
-    # convert state fips to character and add leading zero where necessary
-    fips_codes['state_code'] = fips_codes['state_code'].astype(str)
-    fips_codes['state_code'] = fips_codes['state_code'].str.zfill(2)
+    # convert state fips to character and add leading zero where necessary
+    fips_codes['state_code'] = fips_codes['state_code'].astype(str)
+    fips_codes['state_code'] = fips_codes['state_code'].str.zfill(2)
+
+    # convert county fips to character and add leading zeros where necessary
+    fips_codes['county_code'] = fips_codes['county_code'].astype(str)
+    fips_codes['county_code'] = fips_codes['county_code'].str.zfill(3)
+
+    # concat state_fips and county_fips to get a 5-digit "full_fips"
+    fips_codes['full_fips'] = fips_codes['state_code']+fips_codes['county_code']
+
+    return fips_codes
+
+
+class FipsLookup:
+    """
+    Precomputed, read-only lookups over the FIPS code table, so geographies
+    can be validated and converted without scanning the table.
+
+    Parameters:
+    -----------
+    fips_codes : pandas.DataFrame
+        A DataFrame as returned by load_fips_codes().
+
+    Attributes:
+    -----------
+    state_abbs : mapping
+        State abbreviation keyed by lowercase abbreviation.
+    state_abbs_by_code : mapping
+        State abbreviation keyed by the integer state FIPS code.
+    state_codes : mapping
+        2-digit state FIPS code keyed by state abbreviation.
+    states : tuple
+        Sorted state abbreviations.
+    counties : mapping
+        5-digit county FIPS code keyed by its integer value.
+    county_info : mapping
+        (county name, state code, state abbreviation) keyed by 5-digit
+        county FIPS code.
+    counties_by_state : mapping
+        Tuple of 5-digit county FIPS codes keyed by 2-digit state code, in
+        the order of the FIPS code table.
+    """
+
+    def __init__(self, fips_codes):
+        state_abbs = {}
+        state_abbs_by_code = {}
+        state_codes = {}
+        counties = {}
+        county_info = {}
+        counties_by_state = {}
+
+        for abb, state_code, county, full_fips in zip(
+                fips_codes['state'].str.strip(), fips_codes['state_code'].str.strip(),
+                fips_codes['county'], fips_codes['full_fips'].str.strip()):
+            state_abbs.setdefault(abb.lower(), abb)
+            state_abbs_by_code.setdefault(int(state_code), abb)
+            state_codes.setdefault(abb, state_code)
+            counties.setdefault(int(full_fips), full_fips)
+            county_info.setdefault(full_fips, (county, state_code, abb))
+            counties_by_state.setdefault(state_code, []).append(full_fips)
+
+        self.state_abbs = MappingProxyType(state_abbs)
+        self.state_abbs_by_code = MappingProxyType(state_abbs_by_code)
+        self.state_codes = MappingProxyType(state_codes)
+        self.states = tuple(sorted(state_codes))
+        self.counties = MappingProxyType(counties)
+        self.county_info = MappingProxyType(county_info)
+        self.counties_by_state = MappingProxyType(
+            {k: tuple(v) for k, v in counties_by_state.items()})
+
+        # reverse lookup used to check state codes
+        self._state_code_set = frozenset(state_codes.values())
+
+    def is_state(self, geography):
+        """
+        Whether geography is a state abbreviation or 2-digit state code.
+        """
+        return geography in self.state_codes or geography in self._state_code_set
 
-    # convert county fips to character and add leading zeros where necessary
-    fips_codes['county_code'] = fips_codes['county_code'].astype(str)
-    fips_codes['county_code'] = fips_codes['county_code'].str.zfill(3)
+    def is_county(self, geography):
+        """
+        Whether geography is a 5-digit county FIPS code.
+        """
+        return geography in self.county_info
 
-    # concat state_fips and county_fips to get a 5-digit "full_fips"
-    fips_codes['full_fips'] = fips_codes['state_code']+fips_codes['county_code']
 
-    return fips_codes
+@lru_cache(maxsize=None)
+def get_default_fips_lookup():
+    """
+    Return the FipsLookup built from load_fips_codes(), built once per
+    process.
+    """
+    return FipsLookup(read_fips_codes())
+
+
+def fips_lookup(fips_codes=None):
+    """
+    Return the FipsLookup for fips_codes, or the default lookup if
+    fips_codes is None.
+    """
+    if fips_codes is None:
+        return get_default_fips_lookup()
+    if isinstance(fips_codes, FipsLookup):
+        return fips_codes
+    return FipsLookup(fips_codes)
 
 
 def valid_geography(geography, geography_type=None,
-                    fips_codes=load_fips_codes()):
+                    fips_codes=None):
     """
     Clean the area of interest and ensure it is in a valid format.
 
     Parameters:
     geography (str or int): A numeric value or character string representing
                     either a state abbreviation, state FIPS code, or county FIPS code.
-    fips_codes (DataFrame): A DataFrame containing 'state', 'state_code', and 'county_code' columns.
+    fips_codes (DataFrame or FipsLookup, optional): A DataFrame containing 'state', 'state_code', and 'county_code' columns.
+                    Defaults to the lookup built from load_fips_codes().
 
     Returns:
     str: A character string representing a 5-digit FIPS code.
@@ -77,42 +1021,41 @@ def valid_geography(geography, geography_type=None,
 
     if geography_type in ["fips", None]:
 
+        lookup = fips_lookup(fips_codes)
+
         # get the number of characters in the geography
         n = len(geography)
 
         # if n is less than or equal to 2, process the geography as a state
         if n <= 2:
             # check to see if the geography is one of the state abbreviations
-            if geography in [s.lower() for s in fips_codes['state']]:
-                return fips_codes['state'][[s.lower() for s in fips_codes['state']].index(geography)]
+            if geography in lookup.state_abbs:
+                return lookup.state_abbs[geography]
 
             # check to see if the geography is in one of the state fips codes
-            elif int(geography) in [int(f) for f in fips_codes['state_code']]:
-                matching_fips = fips_codes['state_code'][[int(f) for f in fips_codes['state_code']].index(int(geography))]
-                matching_abb = fips_codes.loc[fips_codes['state_code'] == matching_fips, 'state'].values[0]
-                return matching_abb
+            elif int(geography) in lookup.state_abbs_by_code:
+                return lookup.state_abbs_by_code[int(geography)]
             else:
                 raise ValueError("Invalid area of interest specified. Either use the state's 2 letter abbreviation or the state's FIPS code. If you are attempting to specify a county as the area of interest, use the county's  5-digit FIPS code.")
 
         # if n is greater than 2, process the geography as a county
         if n > 2:
             # check to see if the geography matches a county fips code
-            if int(geography) in [int(f) for f in fips_codes['full_fips']]:
-                matching_fips = fips_codes['full_fips'][[int(f) for f in fips_codes['full_fips']].index(int(geography))]
-                return matching_fips
+            if int(geography) in lookup.counties:
+                return lookup.counties[int(geography)]
             else:
                 raise ValueError("Invalid area of interest specified.")
 
 
 def geography_level(geography, geography_type=None, 
-                    fips_codes=load_fips_codes()):
+                    fips_codes=None):
     """
     Determine the level of the area of interest (geography) based on the 
     provided geography parameter.
     
     Parameters:
     geography (str): The area of interest.
-    fips_codes (DataFrame): A DataFrame containing FIPS codes, defaults to data loading via load_fips_codes().
+    fips_codes (DataFrame or FipsLookup, optional): FIPS codes, defaults to the lookup built from load_fips_codes().
     
     Returns:
     str: The level of the area of interest, which can be "national", "state", or "county".
@@ -121,26 +1064,21 @@ def geography_level(geography, geography_type=None,
     ValueError: If the supplied geography is not valid.
     """
 
+    lookup = fips_lookup(fips_codes)
+
     # make sure supplied geography is valid
-    geography = valid_geography(geography, geography_type)
+    geography = valid_geography(geography, geography_type, lookup)
 
     # check if the area of interest is national
     if geography.lower() in ["us", "conus", "total"]:
         return "national"
 
-    if geography_type in ["fips",None]:
-        # get a list of state codes, state abbreviations, and county fips to
-        # check geography agains
-        state_abb = list(set(fips_codes['state'].str.strip()))
-        state_code = list(set(fips_codes['state_code'].str.strip()))
-        county_fips = list(set(fips_codes['full_fips'].str.strip()))
-
     # check to see if the area of interest is a state
-    if geography in state_code or geography in state_abb:
+    if lookup.is_state(geography):
         return "state"
 
     # check to see if the area of interest is a county
-    if geography in county_fips:
+    if lookup.is_county(geography):
         return "county"
 
 
@@ -273,6 +1211,31 @@ def rename_comp_stat_columns(query, names):
 
     cols_to_change = ["none", "d0", "d1", "d2", "d3", "d4"]
 
+    label = query_stat(query)
+
+    for c in cols_to_change:
+        names = [name.replace(c, f"{c.upper()}_{label}") for name in names]
+    return names
+
+
+def drought_level_columns(columns, drought_threshold):
+    """
+    Return the columns to keep for drought_threshold, leaving out the
+    columns of the other drought levels (e.g. "D3_Area" when 3 is not in
+    drought_threshold). All columns are kept if drought_threshold is None.
+    """
+    if drought_threshold is None:
+        return list(columns)
+    dropped = [f"D{d}" for d in range(5) if d not in drought_threshold]
+    return [c for c in columns if not any(d in c for d in dropped)]
+
+
+def query_stat(query):
+    """
+    Return the statistic ("Area", "AreaPercent", "Population",
+    "PopulationPercent" or "DSCI") requested by a composite statistics url.
+    """
+    label = None
     if "ByArea?" in query:
         label = "Area"
     if "AreaPercent?" in query:
@@ -283,104 +1246,679 @@ def rename_comp_stat_columns(query, names):
         label = "PopulationPercent"
     if "DSCI?" in query:
         label = "DSCI"
+    return label
+
+
+# a request that failed when get_comp_stats was run with on_error="collect"
+FailedRequest = namedtuple("FailedRequest",
+                           ["geography", "stat", "url", "status_code", "exception"])
+
+
+def failed_geographies(errors):
+    """
+    Return the geographies of a list of FailedRequest entries (see
+    get_comp_stats on_error="collect"), without duplicates, to retry them
+    with get_comp_stats(geographies=...).
+    """
+    return list(dict.fromkeys(e.geography for e in errors))
+
+
+def convert_state_code(state, fips_codes=None):
+    """
+    Convert a state name to its corresponding FIPS state code or vice versa.
+    This function takes a state name or FIPS state code and converts it to the
+    corresponding FIPS state code or state name, respectively. The conversion
+    is based on the provided FIPS codes.
+    
+    Parameters:
+    state (str): The state name or FIPS state code to be converted.
+    fips_codes (pd.DataFrame or FipsLookup, optional): FIPS codes with
+                       columns 'state' and 'state_code'. If not
+                       provided, the lookup built from load_fips_codes() is used.
+    
+    Returns:
+    str: The corresponding FIPS state code if a state name is provided, or the
+       corresponding state name if a FIPS state code is provided.
+    
+    Raises:
+    ValueError: If the provided state name or FIPS state code cannot be converted.
+    """
+
+    lookup = fips_lookup(fips_codes)
+    
+    if state in lookup.state_codes:
+        return lookup.state_codes[state]
+    elif lookup.is_state(state):
+        return lookup.state_abbs_by_code[int(state)]
+    else:
+        raise ValueError(f"Unable to convert {state}")
+
+
+def clean_drought_threshold(drought_threshold):
+        """
+        Cleans and validates the drought threshold input.
+        This function ensures that the input drought threshold is a list of integers.
+        If the input is a single integer, it converts it to a list containing that integer.
+        If the input is a string, it raises a ValueError.
+        
+        Parameters:
+        drought_threshold (int or list of int): The drought threshold(s) to be cleaned and validated.
+        
+        Returns:
+        list of int: A list of integers representing the drought thresholds.
+        
+        Raises:
+        ValueError: If the input drought_threshold is a string.
+        """
+        
+        # typ check drought_threshold
+        if isinstance(drought_threshold, str):
+            raise ValueError("drought_threshold must be a list of integers")
+        if isinstance(drought_threshold, int):
+            drought_threshold = [drought_threshold]
+        return drought_threshold
+  
+def clean_stat(stat):
+        """
+        Cleans and standardizes the input statistic(s).
+        This function takes a statistic or a list of statistics and converts them to a standardized format.
+        If a single string is provided, it is converted to a list containing that string. The function then
+        processes each statistic by converting it to lowercase and replacing certain keywords with their
+        standardized counterparts.
+        
+        Args:
+          stat (str or list of str): The statistic(s) to be cleaned. Can be a single string or a list of strings.
+        
+        Returns:
+          list of str: A list of cleaned and standardized statistics.
+        """
+        
+        # clean stat input (put it in a list of a single string was input)
+        if isinstance(stat, str):
+            stat = [stat]
+
+        stat = [
+            s.lower()
+            .replace('area', "Area")
+            .replace('percent', "Percent")
+            .replace('population', "Population")
+            .replace('dsci', "DSCI")
+            .replace("nonconsecutive", "NonConsecutiveStatisticsCounty")
+            .replace("consecutive", "ConsecutiveWeeksCounty")
+            for s in stat
+        ]
+
+        return stat
+
+
+# columns identifying the map each row of a statistics response belongs to
+MAP_DATE_COLUMNS = ["mapDate", "mapStartDate", "mapEndDate"]
+
+
+def combine_comp_stats(frames):
+    """
+    Combine the per-statistic DataFrames of one geography into one.
+
+    The frames are aligned on their map date columns (mapDate, mapStartDate,
+    mapEndDate) and joined in a single concat, which gives the same result as
+    chaining outer merges on all common columns: the columns of the first
+    frame followed by the new columns of each later frame, with rows sorted
+    by map date when more than one frame is combined.
+
+    Parameters:
+    -----------
+    frames : list of pandas.DataFrame
+        The DataFrames to combine.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        The combined DataFrame.
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    keys = [c for c in MAP_DATE_COLUMNS if all(c in df.columns for df in frames)]
+
+    # fall back to merging when the frames can not be aligned on map dates
+    if len(keys) == 0 or any(df.duplicated(keys).any() for df in frames):
+        result_df = frames[0]
+        for df in frames[1:]:
+            result_df = result_df.merge(df, how='outer')
+        return result_df
+
+    # output columns in order of first appearance
+    columns = list(dict.fromkeys(c for df in frames for c in df.columns))
+
+    # the responses for each statistic usually cover the same map dates in
+    # the same order, in which case the columns are placed side by side
+    # without building an index
+    first_keys = frames[0][keys].to_numpy()
+    if all(len(df) == len(first_keys) and (df[keys].to_numpy() == first_keys).all()
+           for df in frames[1:]):
+        seen = set()
+        pieces = []
+        for df in frames:
+            new = [c for c in df.columns if c not in seen]
+            seen.update(new)
+            pieces.append(df[new].reset_index(drop=True))
+        result_df = pd.concat(pieces, axis=1)
+        return result_df.sort_values(keys, kind="stable", ignore_index=True)
+
+    # take each column from the first frame that has it
+    pieces = []
+    shared = []
+    seen = set(keys)
+    for df in frames:
+        indexed = df.set_index(keys)
+        new = [c for c in indexed.columns if c not in seen]
+        seen.update(new)
+        pieces.append(indexed[new])
+        shared.append(indexed[[c for c in indexed.columns if c not in new]])
+
+    result_df = pd.concat(pieces, axis=1, join="outer").sort_index()
+
+    # fill shared columns (e.g. stateAbbreviation) for map dates missing from
+    # the frame they were taken from
+    for df in shared[1:]:
+        for c in df.columns:
+            if result_df[c].isna().any():
+                result_df[c] = result_df[c].fillna(df[c])
+
+    return result_df.reset_index()[columns]
+
+
+def add_geography_identifiers(df, key, fips_codes=None):
+    """
+    Add the county and state identifier columns to get_comp_stats results
+    with a single merge against the FIPS codes.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Results labelled with the geography of each row in the key column.
+    key : str or None
+        "county_fips" to add county_name, state_code and state_name,
+        "state_name" (state abbreviation) to add state_code, or None to
+        leave df unchanged.
+    fips_codes : pd.DataFrame or FipsLookup, optional
+        FIPS codes, defaults to the lookup built from load_fips_codes().
+
+    Returns:
+    --------
+    pandas.DataFrame
+        df with the identifier columns at the end, in the order county_fips,
+        county_name, state_code, state_name.
+    """
+    if key is None or key not in df.columns:
+        return df
+
+    lookup = fips_lookup(fips_codes)
+
+    if key == "county_fips":
+        identifiers = pd.DataFrame(
+            [(fips, *info) for fips, info in lookup.county_info.items()],
+            columns=["county_fips", "county_name", "state_code", "state_name"]
+        )
+    else:
+        identifiers = pd.DataFrame(
+            list(lookup.state_codes.items()), columns=["state_name", "state_code"]
+        )
+
+    df = df.merge(identifiers, on=key, how="left")
+    columns = [c for c in df.columns if c not in identifiers.columns]
+    return df[columns + [c for c in ["county_fips", "county_name", "state_code", "state_name"]
+                         if c in identifiers.columns]]
+
+
+def clean_date_columns(df):
+    """
+    Remove the time of day from every column with "Date" in its name,
+    leaving datetime.date values.
+    """
+    date_columns = [c for c in df.columns if "Date" in c]
+    for c in date_columns:
+        df[c] = pd.to_datetime(df[c]).dt.date
+    return df
+
+
+# identifier columns stored as categoricals by compact_dtypes and as
+# dictionary encoded strings in Parquet output
+DICTIONARY_COLUMNS = ["county_fips", "county_name", "state_code", "state_name",
+                      "fips", "county", "state", "stateAbbreviation"]
+
+
+def compact_dtypes(df):
+    """
+    Convert results to memory efficient dtypes, removing the time of day
+    from the date columns like clean_date_columns:
+
+    - columns with "Date" in their name become datetime64[s] (midnight)
+      instead of datetime.date objects
+    - identifier columns (FIPS codes, state and county names) become
+      categoricals
+    - integer columns are downcast to the smallest integer type and percent
+      columns to float32; other float columns (areas, populations) are kept
+      as float64 so no precision is lost
+    """
+    for c in df.columns:
+        if "Date" in c:
+            df[c] = pd.to_datetime(df[c]).dt.normalize().astype("datetime64[s]")
+        elif c in DICTIONARY_COLUMNS:
+            df[c] = df[c].astype("category")
+        elif pd.api.types.is_integer_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[c]) and "Percent" in c:
+            df[c] = df[c].astype("float32")
+    return df
+
+
+# number of geographies written to each Parquet file by get_comp_stats
+PARQUET_BATCH_SIZE = 100
+
+
+def import_pyarrow():
+    """
+    Import pyarrow, which is needed to write Parquet output.
+    """
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError:
+        raise ImportError(
+            "Writing Parquet output requires pyarrow. Install it with "
+            "`pip install droughtmonitor[parquet]` or `pip install pyarrow`."
+        ) from None
+    return pyarrow
+
+
+def to_arrow_table(df):
+    """
+    Convert results to a pyarrow Table with typed columns: date columns as
+    date32 and identifier columns (FIPS codes, names) as dictionary encoded
+    strings.
+    """
+    pa = import_pyarrow()
+
+    columns = {}
+    for c in df.columns:
+        if "Date" in c:
+            columns[c] = pa.array(pd.to_datetime(df[c])).cast(pa.date32())
+        elif c in DICTIONARY_COLUMNS:
+            columns[c] = pa.array(df[c].astype("string")).dictionary_encode()
+        else:
+            columns[c] = pa.array(df[c])
+    return pa.table(columns)
+
+
+def write_parquet(df, path, partition_cols=None):
+    """
+    Append results to a (hive) partitioned Parquet dataset.
+
+    Each call writes new files, so results can be written chunk by chunk
+    (e.g. from iter_comp_stats) without holding the full result in memory.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The results to write.
+    path : str or os.PathLike
+        Directory of the dataset.
+    partition_cols : list of str, optional
+        Columns to partition by. "year" is derived from mapDate if it is
+        not a column of df. Defaults to no partitioning.
+    """
+    pa = import_pyarrow()
+
+    if df.empty:
+        return
+
+    partition_cols = list(partition_cols or [])
+    if "year" in partition_cols and "year" not in df.columns:
+        df = df.assign(year=pd.to_datetime(df["mapDate"]).dt.year.astype("int16"))
+
+    table = to_arrow_table(df)
+    pa.dataset.write_dataset(
+        table, os.fspath(path), format="parquet",
+        partitioning=partition_cols or None, partitioning_flavor="hive",
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def read_parquet(path):
+    """
+    Read a Parquet dataset written by get_comp_stats or get_weeks_in_drought
+    (output=...) into a DataFrame, keeping partition values such as
+    state_code as strings.
+    """
+    pa = import_pyarrow()
+    path = os.fspath(path)
+
+    # partition values are inferred as integers (e.g. state_code=06 as 6),
+    # so read identifier partitions back as strings
+    discovered = pa.dataset.dataset(path, format="parquet", partitioning="hive")
+    schema = pa.schema([
+        pa.field(f.name, pa.string()) if f.name in DICTIONARY_COLUMNS else f
+        for f in discovered.partitioning.schema
+    ])
+    dataset = pa.dataset.dataset(
+        path, format="parquet",
+        partitioning=pa.dataset.partitioning(schema, flavor="hive")
+    )
+    return dataset.to_table().to_pandas()
+
+
+def load_previous_results(previous):
+    """
+    Load earlier get_comp_stats results for an incremental refresh.
+
+    Parameters:
+    -----------
+    previous : pandas.DataFrame, str or os.PathLike
+        A DataFrame, the path of a .parquet or .csv file written from one, or
+        a Parquet dataset directory written with output=.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        The previous results.
+    """
+    if isinstance(previous, pd.DataFrame):
+        return previous
+
+    path = os.fspath(previous)
+    if os.path.isdir(path):
+        return read_parquet(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+
+    # keep leading zeros on FIPS codes
+    return pd.read_csv(path, dtype={"county_fips": str, "state_code": str})
+
+
+# the first USDM map is valid as of Tuesday 01/04/2000, with a new map every
+# Tuesday since
+FIRST_MAP_DATE = "2000-01-04"
+
+
+@lru_cache(maxsize=None)
+def load_map_date_overrides():
+    """
+    Reads the list of irregular map weeks (map_date_overrides.csv) that is in
+    the 'data' folder.
+    Returns:
+      pandas.DataFrame: A DataFrame with 'scheduled_date' and 'map_date'
+      columns. A missing map_date means no map was issued that week.
+    """
+    file_path = os.path.join(os.path.dirname(__file__),
+                             'data', 'map_date_overrides.csv')
+    overrides = pd.read_csv(file_path, comment="#")
+    overrides['scheduled_date'] = pd.to_datetime(overrides['scheduled_date'])
+    overrides['map_date'] = pd.to_datetime(overrides['map_date'])
+    return overrides
+
+
+def map_date_calendar(now=None):
+    """
+    Compute the USDM map dates locally, without calling the API.
+
+    Maps are valid as of every Tuesday from 01/04/2000 up to the most
+    recently released map (see release_schedule). Irregular weeks listed in
+    map_date_overrides.csv are applied on top of the weekly cadence.
+
+    Parameters:
+    -----------
+    now : datetime, optional
+        A timezone aware datetime to use as the current time.
+
+    Returns:
+    --------
+    pandas.Series
+        The map dates (datetime64) in ascending order.
+    """
+    latest_map, _ = release_schedule(now)
+    map_dates = pd.date_range(FIRST_MAP_DATE, latest_map, freq="7D")
+
+    # apply the irregular weeks
+    overrides = load_map_date_overrides()
+    if len(overrides) > 0:
+        map_dates = map_dates.difference(overrides['scheduled_date'])
+        replacements = overrides['map_date'].dropna()
+        map_dates = map_dates.union(replacements[replacements <= latest_map])
+
+    return pd.Series(map_dates, name="mapDate")
+
+
+def date_windows(start_date, end_date, shard=None, now=None):
+    """
+    Split a query period into windows aligned to the map dates, so each map
+    week falls in exactly one window.
+
+    Every window after the first starts on a map date (a Tuesday) and the
+    window before it ends the day before, e.g. 01/04/2000 - 01/01/2001 and
+    01/02/2001 - 12/31/2001 for yearly windows.
+
+    Parameters:
+    -----------
+    start_date, end_date : str
+        The query period ('MM/DD/YYYY').
+    shard : str or int, optional
+        "year" for calendar year windows, or a number of map weeks per
+        window. None (default) returns the whole period as one window.
+    now : datetime, optional
+        A timezone aware datetime to use as the current time (see
+        map_date_calendar).
+
+    Returns:
+    --------
+    list of (str, str)
+        The start and end date ('MM/DD/YYYY') of each window, in order.
+    """
+    if shard is None:
+        return [(start_date, end_date)]
+
+    start = pd.to_datetime(start_date)
+    end = pd.to_datetime(end_date)
+    map_dates = map_date_calendar(now)
+    map_dates = map_dates[(map_dates >= start) & (map_dates <= end)].reset_index(drop=True)
+
+    # map dates starting a new window
+    if shard == "year":
+        new_year = map_dates.dt.year != map_dates.dt.year.shift()
+        cuts = map_dates[new_year].iloc[1:]
+    else:
+        cuts = map_dates.iloc[shard::shard]
+    cuts = [c for c in cuts if c > start]
+
+    starts = [start] + cuts
+    ends = [c - timedelta(days=1) for c in cuts] + [end]
+    return [(s.strftime("%m/%d/%Y"), e.strftime("%m/%d/%Y")) for s, e in zip(starts, ends)]
+
+
+def clean_shard(shard):
+    """
+    Validate the shard argument of USDM (see date_windows).
+    """
+    if shard is None or shard == "year":
+        return shard
+    if isinstance(shard, int) and not isinstance(shard, bool) and shard > 0:
+        return shard
+    raise ValueError("shard must be None, 'year' or a positive number of weeks")
+
+
+def stitch_windows(frames):
+    """
+    Stitch the time windows of each statistic (see date_windows) back
+    together, dropping any map week returned by two windows.
+
+    Parameters:
+    -----------
+    frames : list of pandas.DataFrame
+        The window results of one geography in window order. Windows of the
+        same statistic have the same columns.
+
+    Returns:
+    --------
+    list of pandas.DataFrame
+        One DataFrame per statistic, in the order the API returns the rows.
+    """
+    # group the windows by statistic, skipping windows without data
+    groups = {}
+    for df in frames:
+        if len(df.columns) > 0:
+            groups.setdefault(tuple(df.columns), []).append(df)
+    if len(groups) == 0:
+        return frames[:1]
+
+    stitched = []
+    for windows in groups.values():
+        if len(windows) > 1 and "mapDate" in windows[0].columns:
+            # keep newest first if that's how the API sorts the rows
+            sample = next((w["mapDate"] for w in windows if len(w) > 1), None)
+            if sample is not None and sample.iloc[0] > sample.iloc[-1]:
+                windows = windows[::-1]
+            df = pd.concat(windows, ignore_index=True)
+            df = df.drop_duplicates(subset="mapDate", keep="first", ignore_index=True)
+        else:
+            df = pd.concat(windows, ignore_index=True)
+        stitched.append(df)
+    return stitched
+
+
+def map_url(map_date):
+    """
+    Return the url of the GeoJSON map dated map_date ('YYYYMMDD').
+    """
+    return f"https://droughtmonitor.unl.edu/data/json/usdm_{map_date}.json"
+
+
+def read_map(content, format="df"):
+    """
+    Parse a downloaded USDM map (GeoJSON bytes) into a GeoDataFrame
+    (format="df") or a dict (format="json"). Module level so it can run in
+    a process pool.
+    """
+    if format == "json":
+        return json_loads(content)
 
-    for c in cols_to_change:
-        names = [name.replace(c, f"{c.upper()}_{label}") for name in names]
-    return names
+    # geopandas is only imported when spatial data is requested
+    import geopandas as gpd
+
+    return gpd.read_file(io.BytesIO(content))
 
 
-def convert_state_code(state, fips_codes=load_fips_codes()):
+class MapStore:
     """
-    Convert a state name to its corresponding FIPS state code or vice versa.
-    This function takes a state name or FIPS state code and converts it to the
-    corresponding FIPS state code or state name, respectively. The conversion
-    is based on the provided FIPS codes DataFrame.
-    
+    A local GeoParquet store of USDM maps, one file per map date
+    (directory/map_date=YYYYMMDD/usdm.parquet). Released maps do not
+    change, so each map is downloaded and parsed from GeoJSON once and
+    read back from the much faster columnar (WKB) file afterwards.
+    Requires pyarrow.
+
     Parameters:
-    state (str): The state name or FIPS state code to be converted.
-    fips_codes (pd.DataFrame, optional): A DataFrame containing FIPS codes with
-                       columns 'state' and 'state_code'. If not
-                       provided, the default is to call load_fips_codes().
-    
-    Returns:
-    str: The corresponding FIPS state code if a state name is provided, or the
-       corresponding state name if a FIPS state code is provided.
-    
-    Raises:
-    ValueError: If the provided state name or FIPS state code cannot be converted.
+    -----------
+    directory : str or os.PathLike
+        Directory of the store. Created if it does not exist.
+
+    Examples:
+    ---------
+    drought = USDM(geography="US", time_period=[2000, 2024], map_store="~/usdm_maps")
+    geo_data = drought.get_spatial_data()
     """
-    
-    if state in fips_codes['state'].unique():
-        match = fips_codes.loc[fips_codes['state'] == state, 'state_code'].values[0]
-        return match
-    elif state in fips_codes['state_code'].unique():
-        match = fips_codes.loc[fips_codes['state_code'] == state, 'state'].values[0]
-        return match
-    else:
-        raise ValueError(f"Unable to convert {state}")
 
+    def __init__(self, directory):
+        import_pyarrow()
+        self.directory = os.path.expanduser(os.fspath(directory))
+        os.makedirs(self.directory, exist_ok=True)
 
-def clean_drought_threshold(drought_threshold):
+    def path(self, map_date):
         """
-        Cleans and validates the drought threshold input.
-        This function ensures that the input drought threshold is a list of integers.
-        If the input is a single integer, it converts it to a list containing that integer.
-        If the input is a string, it raises a ValueError.
-        
-        Parameters:
-        drought_threshold (int or list of int): The drought threshold(s) to be cleaned and validated.
-        
-        Returns:
-        list of int: A list of integers representing the drought thresholds.
-        
-        Raises:
-        ValueError: If the input drought_threshold is a string.
+        Return the file of the map dated map_date ('YYYYMMDD').
         """
-        
-        # typ check drought_threshold
-        if isinstance(drought_threshold, str):
-            raise ValueError("drought_threshold must be a list of integers")
-        if isinstance(drought_threshold, int):
-            drought_threshold = [drought_threshold]
-        return drought_threshold
-  
-def clean_stat(stat):
+        return os.path.join(self.directory, f"map_date={map_date}", "usdm.parquet")
+
+    def __contains__(self, map_date):
+        return os.path.exists(self.path(map_date))
+
+    def map_dates(self):
         """
-        Cleans and standardizes the input statistic(s).
-        This function takes a statistic or a list of statistics and converts them to a standardized format.
-        If a single string is provided, it is converted to a list containing that string. The function then
-        processes each statistic by converting it to lowercase and replacing certain keywords with their
-        standardized counterparts.
-        
-        Args:
-          stat (str or list of str): The statistic(s) to be cleaned. Can be a single string or a list of strings.
-        
-        Returns:
-          list of str: A list of cleaned and standardized statistics.
+        Return the dates ('YYYYMMDD') of the stored maps in order.
         """
-        
-        # clean stat input (put it in a list of a single string was input)
-        if isinstance(stat, str):
-            stat = [stat]
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.directory)
+                      if name.startswith("map_date=") and name.split("=", 1)[1] in self)
 
-        stat = [
-            s.lower()
-            .replace('area', "Area")
-            .replace('percent', "Percent")
-            .replace('population', "Population")
-            .replace('dsci', "DSCI")
-            .replace("nonconsecutive", "NonConsecutiveStatisticsCounty")
-            .replace("consecutive", "ConsecutiveWeeksCounty")
-            for s in stat
-        ]
+    def get(self, map_date):
+        """
+        Return the stored map as a GeoDataFrame, or None if it is not stored.
+        """
+        if map_date not in self:
+            return None
 
-        return stat
+        # geopandas is only imported when spatial data is requested
+        import geopandas as gpd
 
+        return gpd.read_parquet(self.path(map_date))
+
+    def set(self, map_date, gdf):
+        """
+        Store a map. The file is written under a temporary name and moved in
+        place, so an interrupted write never leaves a partial map.
+        """
+        path = self.path(map_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            gdf.to_parquet(temporary)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def clear(self):
+        """
+        Remove every stored map.
+        """
+        for map_date in self.map_dates():
+            os.remove(self.path(map_date))
+            os.rmdir(os.path.dirname(self.path(map_date)))
+
+
+# map dates are only requested from the API once per process
+_map_dates = {}
+
+
+def load_map_dates(session=None, timeout=None, refresh=False):
+    """
+    Load the dates of the USDM maps.
+
+    By default the map dates are computed locally by map_date_calendar, so
+    no API call is made. With refresh=True the dates are requested from the
+    API (once per process) and a warning is raised if they differ from the
+    local calendar.
+
+    Parameters:
+    -----------
+    session : requests.Session, optional
+        Session used when refresh is True.
+    timeout : float or tuple, optional
+        Request timeout used when refresh is True.
+    refresh : bool, optional
+        Whether to request the map dates from the API (default False).
+
+    Returns:
+    --------
+    pandas.Series
+        The map dates (datetime64).
+    """
+    if not refresh:
+        return map_date_calendar()
 
-@lru_cache(maxsize=None)
-def load_map_dates():
     current_year = datetime.now().year
 
+    if current_year in _map_dates:
+        return _map_dates[current_year]
+
     q = (
       "https://usdmdataservices.unl.edu/api/USStatistics/"
       "GetDroughtSeverityStatisticsByArea?aoi=TOTAL&startdate=01/01/2000"
@@ -390,56 +1928,91 @@ def load_map_dates():
     headers = {'Accept': 'application/json'}
 
     # Get the data
-    response = requests.get(q, headers=headers)
+    response = fetch(q, session=session, headers=headers, timeout=timeout)
 
-    # Check status code before continuing
-    check_status_code(response.status_code)
-
-    # Extract the data as a list
-    map_dates = pd.DataFrame(response.json())['mapDate']
+    # Extract the map dates
+    map_dates = records_to_frame(json_loads(response.content), ["mapDate"])['mapDate']
 
     # Convert map_dates to datetime
     map_dates = pd.to_datetime(map_dates)
 
+    # check the local calendar against the API
+    calendar = pd.DatetimeIndex(map_date_calendar())
+    api_dates = pd.DatetimeIndex(map_dates)
+    missing = api_dates.difference(calendar)
+    extra = calendar[calendar <= api_dates.max()].difference(api_dates)
+    if len(missing) > 0 or len(extra) > 0:
+        warnings.warn(
+            "The local map date calendar does not match the USDM API "
+            f"(missing: {list(missing.strftime('%Y-%m-%d'))}, "
+            f"not in API: {list(extra.strftime('%Y-%m-%d'))}). "
+            "Consider updating data/map_date_overrides.csv."
+        )
+
+    _map_dates[current_year] = map_dates
+
     return map_dates
 
 
-def get_closest_mapdate(date):
+def get_closest_mapdate(date, session=None):
         """
         Given a date, this function retrieves the closest map date from the US Drought Monitor data.
         Args:
           date (str): The date for which to find the closest map date. The date should be in a format recognized by pandas.to_datetime().
+          session (requests.Session, optional): Session used to load the map dates.
         Returns:
           str: The closest map date in the format 'YYYYMMDD'.
         Raises:
           ValueError: If the provided date is not valid.
-          requests.exceptions.RequestException: If there is an issue with the HTTP request.
         Notes:
-          - This function fetches data from the US Drought Monitor API.
-          - The function assumes the API returns data in JSON format with a 'mapDate' field.
+          - The map dates are computed locally (see load_map_dates), no API call is made.
+          - Use get_closest_mapdates to look up many dates at once.
         """
         
         date = valid_dates(date)
-        
-        # load map dates 
-        map_dates = load_map_dates()
 
-        # determine which date in map_dates is closest to the date provided
-        closest_date = map_dates.iloc[(map_dates - pd.to_datetime(date[0])).abs().argsort()[:1]]
+        return get_closest_mapdates(date[:1], session=session)[0]
+
+
+def get_closest_mapdates(dates, session=None):
+        """
+        Find the closest map date for each of many dates in one vectorized pass.
+
+        The map dates are sorted once and every date is located with a binary
+        search (searchsorted), instead of sorting all map dates per date as
+        get_closest_mapdate does.
+
+        Args:
+          dates (list of str or pandas.DatetimeIndex): The dates for which to find the closest map dates.
+          session (requests.Session, optional): Session used to load the map dates.
+        Returns:
+          list of str: The closest map date to each date, in the format 'YYYYMMDD'.
+        Raises:
+          ValueError: If any of the dates are not valid.
+        """
+
+        dates = pd.DatetimeIndex(pd.to_datetime(dates, format="mixed"))
+
+        # load map dates as a sorted index
+        map_dates = pd.DatetimeIndex(load_map_dates(session=session)).sort_values()
 
-        # convert closest_date from series to string
-        closest_date = closest_date.to_string(index=False)
+        if len(map_dates) == 1:
+            closest = map_dates[np.zeros(len(dates), dtype=int)]
+        else:
+            # position of the first map date on or after each date, limited so
+            # there is always a map date before (left) and after (right)
+            right = np.clip(map_dates.searchsorted(dates), 1, len(map_dates) - 1)
+            left = right - 1
 
-        # convert closest_date from string to datetime
-        closest_date = pd.to_datetime(closest_date)
+            # take the nearer of the two map dates (the earlier one on ties)
+            use_right = (map_dates[right] - dates) < (dates - map_dates[left])
+            closest = map_dates[np.where(use_right, right, left)]
 
         # convert to format used in USDM url
-        closest_date = closest_date.strftime("%Y%m%d")
-        
-        return closest_date
+        return closest.strftime("%Y%m%d").tolist()
 
 
-def get_counties_in_state(state, geography_type=None, fips_codes=load_fips_codes()):
+def get_counties_in_state(state, geography_type=None, fips_codes=None):
     """
     Get all county FIPS codes for a given state.
     
@@ -449,47 +2022,44 @@ def get_counties_in_state(state, geography_type=None, fips_codes=load_fips_codes
         State abbreviation or FIPS code
     geography_type : str, optional
         The type of geography identifier
-    fips_codes : pd.DataFrame, optional
-        DataFrame containing FIPS codes
+    fips_codes : pd.DataFrame or FipsLookup, optional
+        FIPS codes, defaults to the lookup built from load_fips_codes()
         
     Returns:
     --------
     list
         List of 5-digit county FIPS codes for the state
     """
+    lookup = fips_lookup(fips_codes)
+
     # validate and get the state
-    valid_state = valid_geography(state, geography_type, fips_codes)
+    valid_state = valid_geography(state, geography_type, lookup)
     
     # convert state abbreviation to state code if needed
-    if valid_state in fips_codes['state'].values:
-        state_code = fips_codes.loc[fips_codes['state'] == valid_state, 'state_code'].values[0]
-    else:
-        state_code = valid_state
+    state_code = lookup.state_codes.get(valid_state, valid_state)
     
     # get all counties for this state
-    counties = fips_codes[fips_codes['state_code'] == state_code]['full_fips'].tolist()
-    
-    return counties
+    return list(lookup.counties_by_state.get(state_code, ()))
 
 
-def get_all_states(fips_codes=load_fips_codes()):
+def get_all_states(fips_codes=None):
     """
     Get all state abbreviations.
     
     Parameters:
     -----------
-    fips_codes : pd.DataFrame, optional
-        DataFrame containing FIPS codes
+    fips_codes : pd.DataFrame or FipsLookup, optional
+        FIPS codes, defaults to the lookup built from load_fips_codes()
         
     Returns:
     --------
     list
         List of all state abbreviations
     """
-    return sorted(fips_codes['state'].unique().tolist())
+    return list(fips_lookup(fips_codes).states)
 
 
-def estimate_api_calls(geography, group_by, num_stats=5, fips_codes=load_fips_codes()):
+def estimate_api_calls(geography, group_by, num_stats=5, fips_codes=None):
     """
     Estimate the number of API calls that will be made for a given query.
 
@@ -501,21 +2071,23 @@ def estimate_api_calls(geography, group_by, num_stats=5, fips_codes=load_fips_co
         The grouping parameter
     num_stats : int
         Number of statistics being queried (default 5)
-    fips_codes : pd.DataFrame
-        FIPS codes dataframe
+    fips_codes : pd.DataFrame or FipsLookup, optional
+        FIPS codes, defaults to the lookup built from load_fips_codes()
 
     Returns:
     --------
     int
         Estimated number of API calls
     """
+    lookup = fips_lookup(fips_codes)
+
     # Handle list of geographies
     if isinstance(geography, list):
         if group_by == "county":
             # Sum counties across all states in list
             total_counties = 0
             for state in geography:
-                counties = get_counties_in_state(state, fips_codes=fips_codes)
+                counties = get_counties_in_state(state, fips_codes=lookup)
                 total_counties += len(counties)
             return total_counties * num_stats
         else:
@@ -523,7 +2095,7 @@ def estimate_api_calls(geography, group_by, num_stats=5, fips_codes=load_fips_co
             return len(geography) * num_stats
 
     # Single geography
-    geo_level = geography_level(geography)
+    geo_level = geography_level(geography, fips_codes=lookup)
 
     if group_by is None:
         # Single geography query
@@ -531,21 +2103,69 @@ def estimate_api_calls(geography, group_by, num_stats=5, fips_codes=load_fips_co
     elif group_by == "county":
         if geo_level == "national":
             # All counties in US
-            total_counties = len(fips_codes)
+            total_counties = len(lookup.county_info)
             return total_counties * num_stats
         else:
             # Counties in single state
-            counties = get_counties_in_state(geography, fips_codes=fips_codes)
+            counties = get_counties_in_state(geography, fips_codes=lookup)
             return len(counties) * num_stats
     elif group_by == "state":
         # All states
-        states = get_all_states(fips_codes=fips_codes)
+        states = get_all_states(fips_codes=lookup)
         return len(states) * num_stats
 
     return num_stats
 
 
-def prompt_user_confirmation(num_calls, threshold=50):
+# typical seconds the USDM API takes to answer a statistics request
+REQUEST_LATENCY = 0.5
+
+
+def estimate_duration(num_calls, max_workers=1, rate=None, latency=REQUEST_LATENCY):
+    """
+    Estimate the wall-clock seconds num_calls API calls (see
+    estimate_api_calls) will take.
+
+    Parameters:
+    -----------
+    num_calls : int
+        Number of API calls
+    max_workers : int
+        Number of requests made at the same time (default 1)
+    rate : float, optional
+        Requests per second allowed, defaults to the current rate of the
+        process wide rate limiter (see set_rate_limit)
+    latency : float
+        Seconds per request (default REQUEST_LATENCY)
+
+    Returns:
+    --------
+    float
+        Estimated duration in seconds
+    """
+    if rate is None:
+        rate = _rate_limiter.current_rate
+
+    # limited by either the workers or the rate limit
+    duration = num_calls * latency / max_workers
+    if rate is not None:
+        duration = max(duration, num_calls / rate)
+    return duration
+
+
+def format_duration(seconds):
+    """
+    Format a number of seconds for display, e.g. "45 seconds",
+    "12 minutes" or "3.5 hours".
+    """
+    if seconds < 90:
+        return f"{round(seconds)} seconds"
+    if seconds < 90 * 60:
+        return f"{round(seconds / 60)} minutes"
+    return f"{seconds / 3600:.1f} hours"
+
+
+def prompt_user_confirmation(num_calls, threshold=50, duration=None):
     """
     Prompt user for confirmation when API calls exceed threshold.
 
@@ -555,6 +2175,9 @@ def prompt_user_confirmation(num_calls, threshold=50):
         Number of API calls that will be made
     threshold : int
         Threshold for prompting (default 50)
+    duration : float, optional
+        Estimated seconds the calls will take (see estimate_duration),
+        included in the prompt
 
     Returns:
     --------
@@ -564,8 +2187,13 @@ def prompt_user_confirmation(num_calls, threshold=50):
     if num_calls <= threshold:
         return True
 
+    duration_message = ""
+    if duration is not None:
+        duration_message = f" and take about {format_duration(duration)}"
+
     message = (
-        f"\nWarning: This query will make approximately {num_calls} API calls.\n"
+        f"\nWarning: This query will make approximately {num_calls} API calls"
+        f"{duration_message}.\n"
         f"Do you want to proceed? (yes/no): "
     )
 
@@ -602,6 +2230,54 @@ class USDM:
         Whether to prompt for user confirmation when API calls exceed threshold (default True)
     confirm_threshold : int, optional
         Number of API calls that triggers confirmation prompt (default 50)
+    max_workers : int, optional
+        Number of API calls that can be in flight at the same time when
+        retrieving data for many geographies (default 1, i.e. serial requests).
+    session : requests.Session, optional
+        Session used for every request made by the object. If not supplied, a
+        session with a connection pool of pool_size connections is created
+        (see create_session) and closed by close().
+    pool_size : int, optional
+        Number of connections kept alive in the created session. Defaults to
+        the larger of max_workers and 10.
+    timeout : float or tuple, optional
+        Timeout in seconds for each request, or a (connect, read) tuple
+        (default 60).
+    cache : str, os.PathLike or ResponseCache, optional
+        Directory (or ResponseCache) used to cache API responses on disk.
+        Historical data is cached permanently and data that could include an
+        unreleased map expires at the next Thursday release. Disabled by
+        default.
+    checkpoint : str, os.PathLike or Checkpoint, optional
+        File (or Checkpoint) recording each completed statistics request
+        (geography, statistic and date window). If a long query fails, rerunning
+        it with the same checkpoint only requests the units that did not
+        complete. Units that could include an unreleased map expire at the
+        next map release. Disabled by default.
+    retry : RetryPolicy, optional
+        How failed requests (connection errors, timeouts and 429, 502, 503
+        and 504 responses) are retried. Defaults to DEFAULT_RETRY: up to 5
+        attempts with jittered exponential backoff, honoring Retry-After.
+    compact : bool, optional
+        Return memory efficient DataFrames: datetime64 date columns instead of
+        datetime.date objects, categorical FIPS codes and names, and
+        downcast statistics (see compact_dtypes). Defaults to False; planned
+        to become the default in the next major version.
+    transport : str or dict, optional
+        Format statistics are requested in: "json" (default) or "csv", which
+        is parsed with the pandas C parser and uses less CPU for long
+        histories. A dict chooses per endpoint, e.g.
+        {"comp_stats": "csv", "weeks_in_drought": "json"}.
+    shard : str or int, optional
+        Split each composite statistics query into time windows aligned to
+        the map dates: "year" for calendar years or a number of map weeks.
+        The windows are fetched concurrently (with max_workers > 1) and
+        stitched back together, and windows of past years are cached
+        permanently. Defaults to None (one query for the whole period).
+    map_store : str, os.PathLike or MapStore, optional
+        Directory (or MapStore) of a local GeoParquet store of maps.
+        get_spatial_data(format="df") reads maps from it when present and
+        stores the maps it downloads. Requires pyarrow. Disabled by default.
     url : str
         The base URL for the USDM API.
 
@@ -610,10 +2286,16 @@ class USDM:
     get_comp_stats(stat=["Area", "AreaPercent", "Population", "PopulationPercent", "DSCI"],
                    drought_threshold=[0, 1, 2, 3, 4], threshold_range=None):
         Retrieves composite statistics from the USDM API.
+    iter_comp_stats(stat=[...], drought_threshold=[...], threshold_range=None, batch_size=1):
+        Yields the composite statistics in chunks of batch_size geographies.
     get_weeks_in_drought(drought_threshold=[0, 1, 2, 3, 4], stat=["consecutive", "nonconsecutive"]):
         Retrieves the number of weeks in drought from the USDM API.
     get_spatial_data(format="df"):
         Retrieves spatial data from the USDM API.
+    iter_spatial_data(format="df"):
+        Yields the spatial data one map at a time.
+    close():
+        Closes the session created by the object.
 
     Examples:
     ---------
@@ -632,13 +2314,29 @@ class USDM:
     # Skip confirmation prompt for automated scripts
     usdm = USDM(geography="US", group_by="county", time_period=[2020], confirm=False)
 
+    # Make up to 16 API calls at the same time
+    usdm = USDM(geography="US", group_by="county", time_period=[2020], max_workers=16)
+
     # All states in US
     usdm = USDM(geography="US", group_by="state", time_period=[2020, 2021])
+
+    # Reuse one session (and its open connections) across several objects
+    session = create_session(pool_size=20)
+    usdm = USDM(geography="CA", time_period=[2020], session=session)
+
+    # Cache responses on disk so repeated queries are not downloaded again
+    usdm = USDM(geography="CA", time_period=[2020], cache="~/.cache/droughtmonitor")
+
+    # Resume a long query after a failure instead of starting over
+    usdm = USDM(geography="US", group_by="county", time_period=[2020], checkpoint="us_counties.checkpoint")
     """
 
     def __init__(self, geography=None, geography_type=None,
                  time_period=None, group_by=None,
-                 confirm=True, confirm_threshold=50,
+                 confirm=True, confirm_threshold=50, max_workers=1,
+                 session=None, pool_size=None, timeout=60, cache=None,
+                 checkpoint=None, retry=None, compact=False, transport="json",
+                 shard=None, map_store=None,
                  url="https://usdmdataservices.unl.edu/api/"):
         self.geography_type = geography_type
 
@@ -666,6 +2364,47 @@ class USDM:
         self.confirm = confirm
         self.confirm_threshold = confirm_threshold
 
+        # validate max_workers parameter
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        self.max_workers = max_workers
+
+        # create a session unless one was supplied
+        if session is None:
+            if pool_size is None:
+                pool_size = max(max_workers, 10)
+            session = create_session(pool_size)
+            self._owns_session = True
+        else:
+            self._owns_session = False
+        self.session = session
+        self.timeout = timeout
+        self.retry = retry
+        self.compact = compact
+        self.transport = clean_transport(transport)
+        self.shard = clean_shard(shard)
+
+        # open the local map store if a directory was supplied
+        if map_store is not None and not isinstance(map_store, MapStore):
+            map_store = MapStore(map_store)
+        self.map_store = map_store
+
+        # open the response cache if a directory was supplied
+        if cache is not None and not isinstance(cache, ResponseCache):
+            cache = ResponseCache(cache)
+            self._owns_cache = True
+        else:
+            self._owns_cache = False
+        self.cache = cache
+
+        # open the checkpoint if a path was supplied
+        if checkpoint is not None and not isinstance(checkpoint, Checkpoint):
+            checkpoint = Checkpoint(checkpoint)
+            self._owns_checkpoint = True
+        else:
+            self._owns_checkpoint = False
+        self.checkpoint = checkpoint
+
         # validate group_by parameter
         if group_by not in [None, "county", "state"]:
             raise ValueError("group_by must be None, 'county', or 'state'")
@@ -689,12 +2428,63 @@ class USDM:
         self.start_date = min(self.cleaned_dates)
         self.end_date = max(self.cleaned_dates)   
         self.url = url
-       
+
+        # requests that failed in the last get_comp_stats(on_error="collect")
+        self.errors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close the session, cache and checkpoint if they were created by this
+        object. Those supplied by the user are left open.
+        """
+        if self._owns_session:
+            self.session.close()
+        if self._owns_cache:
+            self.cache.close()
+        if self._owns_checkpoint:
+            self.checkpoint.close()
+
+    def _fetch(self, url, headers=None):
+        """
+        Request a url using the object's session, timeout and cache (see
+        fetch).
+        """
+        return fetch(url, session=self.session, headers=headers,
+                     timeout=self.timeout, cache=self.cache, retry=self.retry)
+
+    def _fetch_unit(self, url, headers=None):
+        """
+        Request a statistics url, skipping it if it was already completed in
+        the object's checkpoint and recording it as completed otherwise.
+        """
+        if self.checkpoint is None:
+            return self._fetch(url, headers=headers)
+
+        accept = (headers or {}).get("Accept")
+        content = self.checkpoint.get(url, accept)
+        if content is not None:
+            return CachedResponse(url, content)
+
+        response = self._fetch(url, headers=headers)
+        self.checkpoint.record(url, response.content, accept)
+        return response
+
     # methods to access each of three main APIs in the USDM
     def get_comp_stats(self, 
                        stat=["Area", "AreaPercent", "Population","PopulationPercent","DSCI"], 
                        drought_threshold=[0, 1, 2, 3, 4], 
-                       threshold_range=None):
+                       threshold_range=None,
+                       previous=None,
+                       output=None,
+                       partition_cols=None,
+                       on_error="raise",
+                       geographies=None):
         
         """
         Retrieves composite statistics from the US Drought Monitor (USDM) API.
@@ -715,60 +2505,374 @@ class USDM:
             A list of drought thresholds to include in the query. Default is [0, 1, 2, 3, 4].
         threshold_range : list of int, optional
             A range of drought thresholds to include in the query. If specified, the query will include thresholds within this range.
+        previous : pandas.DataFrame, str or os.PathLike, optional
+            Results of an earlier get_comp_stats call with the same parameters (or the path of a .csv or .parquet
+            file holding them). Only the map weeks after the latest mapDate of each geography in previous are
+            requested and appended to previous. If there are no new maps, no statistics are requested.
+        output : str or os.PathLike, optional
+            Directory of a Parquet dataset to write the results to instead of returning them. Results are written
+            every 100 geographies as they complete, with dates stored as date32 and FIPS codes and names as
+            dictionary encoded strings. Requires pyarrow. With previous, only the new rows are written.
+        partition_cols : list of str, optional
+            Columns to partition the Parquet output by. Defaults to ["state_code", "year"] (year of mapDate),
+            leaving out state_code when the results have no state_code column.
+        on_error : str, optional
+            "raise" (default) stops at the first failed request. "collect" keeps going and returns the geographies
+            whose requests all succeeded; the failed requests are listed in the errors attribute as FailedRequest
+            (geography, stat, url, status_code, exception) entries.
+        geographies : list of str, optional
+            Only query these geographies (county FIPS codes or states, as in FailedRequest.geography), e.g. to
+            retry the geographies that failed.
+
+        Returns:
+        --------
+        pandas.DataFrame, str or None
+            A DataFrame containing the retrieved composite statistics. When group_by is used, includes additional 
+            geographic identifier columns (state/county names and FIPS codes). If output is given, the output
+            path is returned instead, or None if the user cancels the query and nothing is written.
+
+        Raises:
+        -------
+        ValueError
+            If the provided parameters are not valid.
+
+        Examples:
+        --------
+        # Single geography (original behavior)
+        usdm_instance = USDM(geography="NE", time_period=[2020, 2021])
+        comp_stats_df = usdm_instance.get_comp_stats()
+
+        # All counties in California
+        usdm_instance = USDM(geography="CA", group_by="county", time_period=[2020, 2021])
+        comp_stats_df = usdm_instance.get_comp_stats()
+
+        # Counties in multiple states
+        usdm_instance = USDM(geography=["CA", "OR"], group_by="county", time_period=[2020, 2021])
+        comp_stats_df = usdm_instance.get_comp_stats()
+
+        # All counties nationally (will prompt for confirmation)
+        usdm_instance = USDM(geography="US", group_by="county", time_period=[2020])
+        comp_stats_df = usdm_instance.get_comp_stats()
+
+        # All states
+        usdm_instance = USDM(geography="US", group_by="state", time_period=[2020, 2021])
+        comp_stats_df = usdm_instance.get_comp_stats()
+
+        # Add the weeks released since the last pull
+        usdm_instance = USDM(geography="CA", group_by="county", time_period=[2000, 2026])
+        comp_stats_df = usdm_instance.get_comp_stats(previous="ca_counties.parquet")
+
+        # Write all counties to a Parquet dataset partitioned by state and year
+        usdm_instance = USDM(geography="US", group_by="county", time_period=[2000, 2024], confirm=False)
+        usdm_instance.get_comp_stats(output="us_counties/")
+        comp_stats_df = read_parquet("us_counties/")
+
+        # Keep the counties that succeeded, then retry the ones that failed
+        usdm_instance = USDM(geography="US", group_by="county", time_period=[2000, 2024], confirm=False)
+        comp_stats_df = usdm_instance.get_comp_stats(on_error="collect")
+        retry_df = usdm_instance.get_comp_stats(geographies=failed_geographies(usdm_instance.errors))
+        """
+
+        if output is not None:
+            import_pyarrow()
+
+        errors = self._reset_errors(on_error)
+
+        # clean drought threshold argument and type check it
+        drought_threshold = clean_drought_threshold(drought_threshold)
+        
+        # clean stat input and type check it
+        stat = clean_stat(stat)
+
+        # load the results being refreshed
+        if previous is not None:
+            previous = load_previous_results(previous)
+
+        # build the list of urls to query for each geography
+        queries = self._plan_comp_stats(stat, drought_threshold, threshold_range, previous,
+                                        geographies)
+        if queries is None:
+            # the query was cancelled, nothing was written to output
+            return pd.DataFrame() if output is None else None
+
+        # write the results as geographies complete
+        if output is not None:
+            for chunk in self._comp_stat_chunks(queries, drought_threshold, PARQUET_BATCH_SIZE,
+                                                errors):
+                if partition_cols is None:
+                    partition_cols = [c for c in ["state_code", "year"]
+                                      if c == "year" or c in chunk.columns]
+                write_parquet(chunk, output, partition_cols)
+            return output
+
+        # fetch the queries (concurrently if max_workers > 1) and combine
+        # all geographies into a single result
+        result_df = list(self._comp_stat_chunks(queries, drought_threshold, errors=errors))[0]
+
+        if previous is not None:
+            result_df = self._append_comp_stats(previous, result_df)
+
+        return result_df
+
+    def iter_comp_stats(self,
+                        stat=["Area", "AreaPercent", "Population","PopulationPercent","DSCI"],
+                        drought_threshold=[0, 1, 2, 3, 4],
+                        threshold_range=None,
+                        previous=None,
+                        batch_size=1,
+                        on_error="raise",
+                        geographies=None):
+        """
+        Retrieves composite statistics like get_comp_stats, but yields the
+        results in chunks as soon as they are ready instead of returning a
+        single DataFrame.
+
+        Each chunk holds the rows of batch_size geographies and has the same
+        columns (including geographic identifiers) and date handling as the
+        get_comp_stats result, so concatenating the chunks gives the
+        get_comp_stats result. Only the chunk being processed (plus up to
+        2 * max_workers fetched responses) is held in memory.
+
+        Parameters:
+        -----------
+        stat, drought_threshold, threshold_range :
+            See get_comp_stats.
+        previous : pandas.DataFrame, str or os.PathLike, optional
+            Earlier results (see get_comp_stats). Only the new rows are yielded.
+        batch_size : int, optional
+            Number of geographies per chunk (default 1).
+        on_error, geographies :
+            See get_comp_stats. With on_error="collect", errors lists the failed
+            requests once the iteration finishes.
+
+        Yields:
+        -------
+        pandas.DataFrame
+            The statistics for the next batch_size geographies, in the same
+            order as get_comp_stats.
+
+        Examples:
+        --------
+        usdm_instance = USDM(geography="US", group_by="county", time_period=[2000, 2024],
+                             confirm=False, max_workers=16)
+        for chunk in usdm_instance.iter_comp_stats(batch_size=100):
+            load_into_warehouse(chunk)
+        """
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+
+        errors = self._reset_errors(on_error)
+
+        # clean drought threshold argument and type check it
+        drought_threshold = clean_drought_threshold(drought_threshold)
+
+        # clean stat input and type check it
+        stat = clean_stat(stat)
+
+        # load the results being refreshed
+        if previous is not None:
+            previous = load_previous_results(previous)
+
+        # build the list of urls to query for each geography
+        queries = self._plan_comp_stats(stat, drought_threshold, threshold_range, previous,
+                                        geographies)
+        if queries is None:
+            return
+
+        yield from self._comp_stat_chunks(queries, drought_threshold, batch_size, errors)
+
+    def _reset_errors(self, on_error):
+        """
+        Validate on_error and clear the errors attribute. Returns the list
+        failed requests are collected in, or None if they should be raised.
+        """
+        if on_error not in ["raise", "collect"]:
+            raise ValueError("on_error must be 'raise' or 'collect'")
+        self.errors = []
+        return self.errors if on_error == "collect" else None
+
+    def _comp_stat_chunks(self, queries, drought_threshold, batch_size=None, errors=None):
+        """
+        Fetch the queries and yield finalized results for every batch_size
+        geographies. If batch_size is None, a single DataFrame holding every
+        geography is yielded (even if it is empty). If errors is a list,
+        failed requests are appended to it and their geographies left out.
+        """
+        progress_desc = self._comp_stat_progress_desc([geo for geo, _ in queries])
+
+        # initialize list to store the results of the current batch
+        batch = []
+
+        # merge the statistics for each geography in the original order
+        for geo, frames in self._fetch_comp_stats(queries, progress_desc, errors,
+                                                  drought_threshold):
+            geo_result_df = self._merge_comp_stats(geo, frames)
+            if geo_result_df is not None:
+                batch.append(geo_result_df)
+
+            if batch_size is not None and len(batch) >= batch_size:
+                yield self._finalize_comp_stats(batch, drought_threshold)
+                batch = []
+
+        if len(batch) > 0 or batch_size is None:
+            yield self._finalize_comp_stats(batch, drought_threshold)
+
+    def _plan_comp_stats(self, stat, drought_threshold, threshold_range, previous=None,
+                         geographies=None):
+        """
+        Determine the geographies to query (unless geographies is given), ask
+        for confirmation if needed and build the urls for each geography.
+
+        Returns:
+        --------
+        list of (str, list of str) or None
+            Pairs of geography and the urls to query for it, or None if the
+            user cancelled the query.
+        """
+        # determine geographies to query
+        if geographies is None:
+            geographies = self._comp_stat_geographies()
+            estimated_calls = None
+        else:
+            if isinstance(geographies, str):
+                geographies = [geographies]
+            geographies = list(dict.fromkeys(geographies))
+            estimated_calls = len(geographies) * len(stat) * self._num_windows()
+
+        # when refreshing, start each geography after the latest map date in
+        # previous and skip the geographies without new maps
+        if previous is not None:
+            start_dates = self._refresh_start_dates(previous, geographies)
+            geographies = [geo for geo in geographies if geo in start_dates]
+            if len(geographies) == 0:
+                return []
+            estimated_calls = len(geographies) * len(stat) * self._num_windows()
+        else:
+            start_dates = {}
+
+        # Estimate API calls and get confirmation if needed
+        if not self._confirm_comp_stats(stat, estimated_calls):
+            return None
+
+        return [
+            (geo, self._comp_stat_queries(geo, stat, drought_threshold,
+                                          threshold_range, start_dates.get(geo)))
+            for geo in geographies
+        ]
+
+    def _geography_column(self):
+        """
+        Return the column of get_comp_stats results identifying the
+        geography of each row, or None for a single geography.
+        """
+        if self.group_by == "county":
+            return "county_fips"
+        if self.group_by == "state" or self.geography_list_input:
+            return "state_name"
+        return None
+
+    def _refresh_start_dates(self, previous, geographies):
+        """
+        Find the start date of the query for each geography when refreshing
+        previous results.
 
         Returns:
         --------
-        pandas.DataFrame
-            A DataFrame containing the retrieved composite statistics. When group_by is used, includes additional 
-            geographic identifier columns (state/county names and FIPS codes).
+        dict
+            Start date ('MM/DD/YYYY') keyed by geography. Geographies without
+            any map after their latest mapDate (up to the end date) are left
+            out.
+        """
+        map_dates = load_map_dates(session=self.session)
+        start_date = pd.to_datetime(self.start_date)
+        end_date = pd.to_datetime(self.end_date)
+
+        # latest map date of each geography in the previous results
+        previous_dates = pd.to_datetime(previous["mapDate"])
+        key = self._geography_column()
+        if key is None:
+            latest = {geographies[0]: previous_dates.max()}
+        else:
+            latest = previous_dates.groupby(previous[key].astype(str)).max().to_dict()
 
-        Raises:
-        -------
-        ValueError
-            If the provided parameters are not valid.
+        start_dates = {}
+        for geo in geographies:
+            if pd.isna(latest.get(geo, pd.NaT)):
+                # geography not in previous results, query the full period
+                start_dates[geo] = self.start_date
+            elif ((map_dates > latest[geo]) & (map_dates <= end_date)).any():
+                start = max(latest[geo] + timedelta(days=1), start_date)
+                start_dates[geo] = start.strftime("%m/%d/%Y")
 
-        Examples:
-        --------
-        # Single geography (original behavior)
-        usdm_instance = USDM(geography="NE", time_period=[2020, 2021])
-        comp_stats_df = usdm_instance.get_comp_stats()
+        return start_dates
 
-        # All counties in California
-        usdm_instance = USDM(geography="CA", group_by="county", time_period=[2020, 2021])
-        comp_stats_df = usdm_instance.get_comp_stats()
+    def _append_comp_stats(self, previous, result_df):
+        """
+        Append refreshed rows to the previous results, keeping the newest
+        row for any geography and map date found in both.
+        """
+        previous = self._clean_dtypes(previous.copy())
+        if result_df.empty:
+            return previous
 
-        # Counties in multiple states
-        usdm_instance = USDM(geography=["CA", "OR"], group_by="county", time_period=[2020, 2021])
-        comp_stats_df = usdm_instance.get_comp_stats()
+        combined = pd.concat([previous, result_df], ignore_index=True)
+        key = [c for c in [self._geography_column(), "mapDate"] if c in combined.columns]
+        combined = combined.drop_duplicates(subset=key, keep="last", ignore_index=True)
 
-        # All counties nationally (will prompt for confirmation)
-        usdm_instance = USDM(geography="US", group_by="county", time_period=[2020])
-        comp_stats_df = usdm_instance.get_comp_stats()
+        # concatenating categoricals with different categories gives objects
+        return compact_dtypes(combined) if self.compact else combined
 
-        # All states
-        usdm_instance = USDM(geography="US", group_by="state", time_period=[2020, 2021])
-        comp_stats_df = usdm_instance.get_comp_stats()
+    def _clean_dtypes(self, df):
         """
+        Remove the time of day from the date columns and, if compact is set,
+        convert the results to compact dtypes (see compact_dtypes).
+        """
+        if self.compact:
+            return compact_dtypes(df)
+        return clean_date_columns(df)
 
-        # clean drought threshold argument and type check it
-        drought_threshold = clean_drought_threshold(drought_threshold)
-        
-        # clean stat input and type check it
-        stat = clean_stat(stat)
-
-        # Estimate API calls and get confirmation if needed
-        num_stats = len(stat)
-        estimated_calls = estimate_api_calls(
-            geography=self.geography_input if hasattr(self, 'geography_input') else self.geography,
-            group_by=self.group_by,
-            num_stats=num_stats
-        )
+    def _confirm_comp_stats(self, stat, estimated_calls=None):
+        """
+        Estimate the number of API calls for stat (unless estimated_calls is
+        given) and, if confirm is set, ask the user whether to proceed.
+        Returns True if the query should run.
+        """
+        if estimated_calls is None:
+            # one call per statistic and time window
+            num_stats = len(stat) * self._num_windows()
+            estimated_calls = estimate_api_calls(
+                geography=self.geography_input if hasattr(self, 'geography_input') else self.geography,
+                group_by=self.group_by,
+                num_stats=num_stats
+            )
 
-        if self.confirm and not prompt_user_confirmation(estimated_calls, self.confirm_threshold):
+        if self.confirm and not prompt_user_confirmation(
+                estimated_calls, self.confirm_threshold,
+                duration=estimate_duration(estimated_calls, self._concurrent_requests())):
             print("Query cancelled by user.")
-            return pd.DataFrame()
+            return False
+        return True
 
-        # determine geographies to query
+    def _concurrent_requests(self):
+        """
+        Return the number of requests the object sends at the same time.
+        """
+        return self.max_workers
+
+    def _num_windows(self):
+        """
+        Return the number of time windows each statistic is split into (see
+        shard).
+        """
+        if self.shard is None:
+            return 1
+        return len(date_windows(self.start_date, self.end_date, self.shard))
+
+    def _comp_stat_geographies(self):
+        """
+        Return the list of geographies get_comp_stats queries, based on the
+        geography and group_by parameters.
+        """
         if self.geography_list_input:
             if self.group_by == "county":
                 # Get all counties across all states in the list
@@ -794,146 +2898,265 @@ class USDM:
         elif self.group_by == "state":
             # get all states
             geographies = get_all_states()
-        
-        # initialize list to store all results
-        all_results = []
 
-        # process each geography
+        return geographies
+
+    def _comp_stat_progress_desc(self, geographies):
+        """
+        Return the progress bar description for a get_comp_stats query.
+        """
         if self.group_by:
             if self.geography_list_input and self.group_by == "county":
-                progress_desc = f"Loading statistics for counties in {len(self.geography)} states"
+                return f"Loading statistics for counties in {len(self.geography)} states"
             elif self.group_by == "county" and geography_level(self.geography) == "national":
-                progress_desc = f"Loading statistics for all {len(geographies)} counties (national)"
-            else:
-                progress_desc = f"Loading statistics (by {self.group_by})"
-        else:
-            progress_desc = "Loading comprehensive statistics"
-        
-        for geo in tqdm(geographies, desc=progress_desc):
-            
-            # Define area based on geography level for current geo
-            if self.group_by == "county":
-                area = "CountyStatistics/"
-                aoi = geo  # county FIPS code
-            elif self.group_by == "state":
-                area = "StateStatistics/"
-                aoi = convert_state_code(geo)  # convert to state FIPS
+                return f"Loading statistics for all {len(geographies)} counties (national)"
             else:
-                # original behavior
-                area = {
-                    "national": "USStatistics/",
-                    "state": "StateStatistics/",
-                    "county": "CountyStatistics/"
-                }.get(geography_level(self.geography))
-                
-                if area == "StateStatistics/":
-                    aoi = convert_state_code(self.geography)
-                else:
-                    aoi = self.geography
-
-            # initialize a vector to store queries for this geography
-            query = []
-
-            # Stat type can be 1 or 2, but both values appear to return the same data
-            stat_type = 1
-
-            # construct portion of the query related to min/max thresholds
-            if threshold_range is not None:
-                stat_endpoint = "BasicStatisticsBy"
-                threshold_query = f"&dx={drought_threshold[0]}&DxLevelThresholdFrom={min(threshold_range)}&DxLevelThresholdTo={max(threshold_range)}"
-            else:
-                threshold_query = ""
-                stat_endpoint = "DroughtSeverityStatisticsBy"
-
-            # paste the components specific to the variable together
-            query.extend(
-               [
-                  f'{self.url}{area}Get{stat_endpoint*(s != "DSCI")}{s}?aoi={aoi}{threshold_query}&startdate={self.start_date}&enddate={self.end_date}&statisticsType={stat_type}'
-                  for s in stat
-               ]
-            )
-
-            # initialize data as a dict for this geography
-            data_dict = {}
-            index = 1
-
-            # loop over each individual url in the query vector
-            for q in query:
-                # header specifying data should be returned in json format
-                headers = {'Accept': 'application/json'}
-
-                # get the data
-                response = requests.get(q, headers=headers)
-                
-                # check status code before continuing
-                check_status_code(response.status_code)
-
-                # extract the data as a list
-                data = response.json()
-
-                # add data to data_dict dictionary
-                data_dict[index] = pd.DataFrame(data)
-
-                data_dict[index].columns = rename_comp_stat_columns(query=q, names=data_dict[index].columns)
-
-                # rename columns
-                data_dict[index].rename(columns={
-                    "validStart": "mapStartDate",
-                    "validEnd": "mapEndDate",
-                }, inplace=True)
-
-                # advance index
-                index += 1
-
-            # merge each of the dataframes for this geography
-            if len(data_dict) > 0:
-                geo_result_df = data_dict[1]
-                for i in range(2, len(data_dict) + 1):
-                    geo_result_df = geo_result_df.merge(data_dict[i], how='outer')
-
-                # add geographic identifiers if grouping
-                if self.group_by == "county":
-                    # add county and state information
-                    fips_codes = load_fips_codes()
-                    county_info = fips_codes[fips_codes['full_fips'] == geo].iloc[0]
-                    geo_result_df['county_fips'] = geo
-                    geo_result_df['county_name'] = county_info['county']
-                    geo_result_df['state_code'] = county_info['state_code']
-                    geo_result_df['state_name'] = county_info['state']
-                elif self.group_by == "state":
-                    # add state information
-                    geo_result_df['state_code'] = convert_state_code(geo)
-                    geo_result_df['state_name'] = geo
-                elif self.geography_list_input and self.group_by is None:
-                    # List of states without grouping - add state identifiers
-                    fips_codes = load_fips_codes()
-                    state_info = fips_codes[fips_codes['state'] == geo].iloc[0]
-                    geo_result_df['state_code'] = state_info['state_code']
-                    geo_result_df['state_name'] = geo
-
-                all_results.append(geo_result_df)
+                return f"Loading statistics (by {self.group_by})"
+        return "Loading comprehensive statistics"
 
+    def _finalize_comp_stats(self, all_results, drought_threshold):
+        """
+        Combine the per-geography results, remove the time of day from the
+        date columns and drop the columns not in drought_threshold.
+        """
         # combine all results
         if len(all_results) > 0:
             result_df = pd.concat(all_results, ignore_index=True)
         else:
             result_df = pd.DataFrame()
 
+        # add geographic identifiers if grouping
+        result_df = add_geography_identifiers(result_df, self._geography_column())
+
         # remove time of day from date columns
-        date_columns = [c for c in result_df.columns if "Date" in c]
-        for c in date_columns:
-            result_df[c] = pd.to_datetime(result_df[c]).dt.date
+        result_df = self._clean_dtypes(result_df)
 
         # remove any columns not defined by the drought threshold
-        # if drought threshold was defined. 
-        if drought_threshold is not None:
-            for d in range(5):
-              if d not in drought_threshold:
-                result_df = result_df[[c for c in result_df.columns if f"D{d}" not in c]]
-        
+        # if drought threshold was defined (already dropped from each
+        # response, so this is a single projection at most)
+        columns = drought_level_columns(result_df.columns, drought_threshold)
+        if len(columns) < len(result_df.columns):
+            result_df = result_df[columns]
+
         return result_df
 
-    def get_weeks_in_drought(self, drought_threshold=[0, 1, 2, 3, 4], stat=["consecutive", "nonconsecutive"]):
+    def _comp_stat_queries(self, geo, stat, drought_threshold, threshold_range,
+                           start_date=None):
+        """
+        Build the composite statistic urls for a single geography.
+
+        Parameters:
+        -----------
+        geo : str
+            The geography being queried (county FIPS code or state abbreviation
+            when grouping, otherwise the USDM object's geography).
+        stat : list of str
+            Cleaned statistics to query (see clean_stat).
+        drought_threshold : list of int
+            Cleaned drought thresholds.
+        threshold_range : list of int or None
+            Optional range of drought thresholds.
+        start_date : str, optional
+            Start date ('MM/DD/YYYY') of the query, defaults to the object's
+            start date.
+
+        Returns:
+        --------
+        list of str
+            One url per statistic (and time window if shard is set), in the
+            same order as stat.
+        """
+
+        # Define area based on geography level for current geo
+        if self.group_by == "county":
+            area = "CountyStatistics/"
+            aoi = geo  # county FIPS code
+        elif self.group_by == "state":
+            area = "StateStatistics/"
+            aoi = convert_state_code(geo)  # convert to state FIPS
+        else:
+            # original behavior
+            area = {
+                "national": "USStatistics/",
+                "state": "StateStatistics/",
+                "county": "CountyStatistics/"
+            }.get(geography_level(geo))
+
+            if area == "StateStatistics/":
+                aoi = convert_state_code(geo)
+            else:
+                aoi = geo
+
+        # Stat type can be 1 or 2, but both values appear to return the same data
+        stat_type = 1
+
+        if start_date is None:
+            start_date = self.start_date
+
+        # construct portion of the query related to min/max thresholds
+        if threshold_range is not None:
+            stat_endpoint = "BasicStatisticsBy"
+            threshold_query = f"&dx={drought_threshold[0]}&DxLevelThresholdFrom={min(threshold_range)}&DxLevelThresholdTo={max(threshold_range)}"
+        else:
+            threshold_query = ""
+            stat_endpoint = "DroughtSeverityStatisticsBy"
+
+        # split the period into time windows if sharding
+        windows = date_windows(start_date, self.end_date, self.shard)
+
+        # paste the components specific to the variable together
+        return [
+            f'{self.url}{area}Get{stat_endpoint*(s != "DSCI")}{s}?aoi={aoi}{threshold_query}&startdate={window_start}&enddate={window_end}&statisticsType={stat_type}'
+            for s in stat
+            for window_start, window_end in windows
+        ]
+
+    def _fetch_comp_stat(self, q, drought_threshold=None):
+        """
+        Fetch a single composite statistic url and return it as a DataFrame
+        with the statistic specific column names, keeping only the drought
+        levels in drought_threshold.
+        """
+        # only materialize the columns of the requested drought levels
+        def select(names):
+            renamed = rename_comp_stat_columns(query=q, names=names)
+            keep = set(drought_level_columns(renamed, drought_threshold))
+            return [n for n, r in zip(names, renamed) if r in keep]
+
+        # get the data
+        df = self._fetch_frame(q, "comp_stats", select)
+
+        df.columns = rename_comp_stat_columns(query=q, names=df.columns)
+
+        # rename columns
+        df.rename(columns={
+            "validStart": "mapStartDate",
+            "validEnd": "mapEndDate",
+        }, inplace=True)
+
+        return df
+
+    def _fetch_frame(self, q, endpoint, select=None):
+        """
+        Fetch a statistics url in the transport chosen for endpoint and parse
+        it into a DataFrame with the JSON field names. select is called with
+        the field names and returns the fields to keep.
+        """
+        transport = self.transport[endpoint]
+
+        # header specifying the format data should be returned in
+        headers = {'Accept': TRANSPORTS[transport]}
+
+        # get the data
+        response = self._fetch_unit(q, headers=headers)
+
+        if transport == "csv":
+            return csv_to_frame(response.content, select)
+
+        # extract the data as a list
+        records = json_loads(response.content)
+        columns = record_fields(records)
+        if select is not None:
+            columns = select(columns)
+        return records_to_frame(records, columns)
+
+    def _fetch_comp_stats(self, queries, progress_desc, errors=None, drought_threshold=None):
+        """
+        Fetch every url in queries, using a pool of max_workers threads when
+        max_workers is greater than one.
+
+        Parameters:
+        -----------
+        queries : list of (str, list of str)
+            Pairs of geography and the urls to query for that geography.
+        progress_desc : str
+            Description shown on the progress bar.
+        errors : list, optional
+            If supplied, failed requests are appended to it as FailedRequest
+            entries and geographies with a failed request are skipped instead
+            of raising.
+        drought_threshold : list of int, optional
+            Drought levels to keep when parsing each response.
+
+        Yields:
+        -------
+        tuple of (str, list of pandas.DataFrame)
+            Each geography with one DataFrame per url, in the order the
+            geographies (and urls) were supplied.
+
+        Notes:
+        ------
+        At most 2 * max_workers requests are submitted ahead of the
+        geography being yielded, so fetched data does not pile up when the
+        consumer is slower than the API.
+        """
+        from tqdm import tqdm
+
+        urls = (q for _, geo_queries in queries for q in geo_queries)
+
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as executor:
+            # futures are consumed in submission order regardless of the
+            # order in which the requests complete
+            pending = deque(executor.submit(self._fetch_comp_stat, q, drought_threshold)
+                            for q in islice(urls, 2 * self.max_workers))
+
+            def next_frame():
+                future = pending.popleft()
+                q = next(urls, None)
+                if q is not None:
+                    pending.append(executor.submit(self._fetch_comp_stat, q, drought_threshold))
+                return future.result()
+
+            try:
+                for geo, geo_queries in tqdm(queries, desc=progress_desc):
+                    if errors is None:
+                        yield geo, [next_frame() for _ in geo_queries]
+                        continue
+
+                    # keep going past failed requests, recording them
+                    frames = []
+                    failed = False
+                    for q in geo_queries:
+                        try:
+                            frames.append(next_frame())
+                        except Exception as e:
+                            errors.append(FailedRequest(
+                                geography=geo, stat=query_stat(q), url=q,
+                                status_code=getattr(e, "status_code", None), exception=e))
+                            failed = True
+                    if not failed:
+                        yield geo, frames
+            finally:
+                # don't wait for requests that will not be used
+                for future in pending:
+                    future.cancel()
+
+    def _merge_comp_stats(self, geo, frames):
+        """
+        Merge the per-statistic DataFrames for a geography and add geographic
+        identifiers when grouping. Returns None if no data was fetched.
+        """
+        if len(frames) == 0:
+            return None
+
+        # stitch the time windows of each statistic back together
+        if self.shard is not None:
+            frames = stitch_windows(frames)
+
+        # combine each of the dataframes for this geography
+        geo_result_df = combine_comp_stats(frames)
+
+        # label the rows with the geography if grouping, the remaining
+        # identifiers are added for all geographies at once
+        # (see add_geography_identifiers)
+        key = self._geography_column()
+        if key is not None:
+            geo_result_df[key] = geo
+
+        return geo_result_df
+
+    def get_weeks_in_drought(self, drought_threshold=[0, 1, 2, 3, 4], stat=["consecutive", "nonconsecutive"],
+                             output=None, partition_cols=None):
         """
         Retrieve the number of weeks in drought for specified drought levels and statistics.
         
@@ -948,12 +3171,16 @@ class USDM:
           List of drought levels to query. Default is [0, 1, 2, 3, 4].
         stat : list of str, optional
           List of statistics to query. Options are "consecutive" and "nonconsecutive". Default is ["consecutive", "nonconsecutive"].
+        output : str or os.PathLike, optional
+          Directory of a Parquet dataset to write the results to instead of returning them. Requires pyarrow.
+        partition_cols : list of str, optional
+          Columns to partition the Parquet output by. Defaults to ["state"].
         Returns:
         --------
-        pd.DataFrame
+        pd.DataFrame or str
           A DataFrame containing the number of weeks in drought for each specified drought level and statistic.
           The DataFrame includes columns for consecutive and nonconsecutive weeks, start and end dates for consecutive weeks,
-          and the query date range.
+          and the query date range. If output is given, the output path is returned instead.
         Raises:
         -------
         ValueError
@@ -974,6 +3201,9 @@ class USDM:
         weeks_df = usdm_instance.get_weeks_in_drought()  # Same result as without group_by
         """
 
+        if output is not None:
+            import_pyarrow()
+
         # clean drought threshold argument and type check it
         drought_threshold = clean_drought_threshold(drought_threshold)
 
@@ -982,80 +3212,77 @@ class USDM:
 
         # Note: get_weeks_in_drought always returns county-level data from the USDM API
         # Therefore, we ignore the group_by parameter and use the original geography
-        geographies = [self.geography]
-        
-        # initialize list to store all results
-        all_results = []
+        query = self._weeks_in_drought_queries(self.geography, stat, drought_threshold)
+
+        from tqdm import tqdm
 
-        # define area for weeks in drought 
-        area = "ConsecutiveNonConsecutiveStatistics/"
-        
         # process the geography (always single geography for weeks in drought)
         progress_desc = "Loading weeks in drought data"
-            
-        for geo in tqdm(geographies, desc=progress_desc):
-            
-            # initialize a list to store queries for this geography
-            query = []
-
-            # iterate over stat_type and drought_threshold to create a list of queries
-            query.extend(
-              [
-                f"{self.url}{area}Get{s}?geography={geo}&dx={drought_level}&minimumweeks=0&startdate={self.start_date}&enddate={self.end_date}"
-                for drought_level in drought_threshold
-                for s in stat
-              ]
-            )
 
-            # initialize data as a dict for this geography
-            data_dict = {}
-            index = 1
-
-            # loop over each individual url in the query vector
-            for q in query:
-                # header specifying data should be returned in json format
-                headers = {'Accept': 'application/json'}
-
-                # get the data
-                response = requests.get(q, headers=headers)
-                
-                # check status code before continuing
-                check_status_code(response.status_code)
-
-                # extract the data as a list
-                data = response.json()
-
-                # add data to data_dict dictionary
-                data_dict[index] = pd.DataFrame(data)
-
-                # get the drought level from the query
-                drought_level_label = None
-                for d in range(5):
-                  if f"dx={d}" in q:
-                    drought_level_label = f"D{d}"
-
-                # relabel columns to include drought level
-                data_dict[index].rename(columns={
-                    "nonConsecutiveWeeks": f"{drought_level_label}_NonConsecutiveWeeks",
-                    "consecutiveWeeks": f"{drought_level_label}_ConsecutiveWeeks",
-                    "startDate": f"{drought_level_label}_ConsecutiveWeeksStartDate",
-                    "endDate": f"{drought_level_label}_ConsecutiveWeeksEndDate",
-                }, inplace=True)
-
-                # advance index
-                index += 1
-            
-            # merge each of the dataframes for this geography
-            if len(data_dict) > 0:
-                geo_result_df = data_dict[1]
-                for i in range(2, len(data_dict) + 1):
-                    geo_result_df = geo_result_df.merge(data_dict[i], how='outer')
+        # loop over each individual url in the query vector
+        frames = [self._fetch_weeks_in_drought(q)
+                  for q in tqdm(query, desc=progress_desc)]
 
-                all_results.append(geo_result_df)
+        result_df = self._finalize_weeks_in_drought(frames)
 
-        # combine all results (should only be one geography)
-        if len(all_results) > 0:
-            result_df = all_results[0]  # Only one geography, so take the first result
+        # write the results to a Parquet dataset partitioned by state
+        if output is not None:
+            if partition_cols is None:
+                partition_cols = ["state"] if "state" in result_df.columns else []
+            write_parquet(result_df, output, partition_cols)
+            return output
+
+        return result_df
+
+    def _weeks_in_drought_queries(self, geo, stat, drought_threshold):
+        """
+        Build the weeks in drought urls for a geography, one per drought level
+        and statistic.
+        """
+        # define area for weeks in drought 
+        area = "ConsecutiveNonConsecutiveStatistics/"
+
+        # iterate over stat_type and drought_threshold to create a list of queries
+        return [
+            f"{self.url}{area}Get{s}?geography={geo}&dx={drought_level}&minimumweeks=0&startdate={self.start_date}&enddate={self.end_date}"
+            for drought_level in drought_threshold
+            for s in stat
+        ]
+
+    def _fetch_weeks_in_drought(self, q):
+        """
+        Fetch a single weeks in drought url and return it as a DataFrame with
+        the columns labelled by drought level.
+        """
+        # get the data
+        df = self._fetch_frame(q, "weeks_in_drought")
+
+        # get the drought level from the query
+        drought_level_label = None
+        for d in range(5):
+          if f"dx={d}" in q:
+            drought_level_label = f"D{d}"
+
+        # relabel columns to include drought level
+        df.rename(columns={
+            "nonConsecutiveWeeks": f"{drought_level_label}_NonConsecutiveWeeks",
+            "consecutiveWeeks": f"{drought_level_label}_ConsecutiveWeeks",
+            "startDate": f"{drought_level_label}_ConsecutiveWeeksStartDate",
+            "endDate": f"{drought_level_label}_ConsecutiveWeeksEndDate",
+        }, inplace=True)
+
+        return df
+
+    def _finalize_weeks_in_drought(self, frames):
+        """
+        Merge the weeks in drought DataFrames, add the query date range and
+        remove the time of day from the date columns.
+        """
+        # merge each of the dataframes for this geography
+        if len(frames) > 0:
+            result_df = frames[0]
+            for df in frames[1:]:
+                result_df = result_df.merge(df, how='outer')
         else:
             result_df = pd.DataFrame()
 
@@ -1064,19 +3291,21 @@ class USDM:
         result_df['QueryEndDate'] = pd.to_datetime(self.end_date)
 
         # remove time of day from date columns
-        date_columns = [c for c in result_df.columns if "Date" in c]
-        for c in date_columns:
-            result_df[c] = pd.to_datetime(result_df[c]).dt.date
-      
-        return result_df
+        return self._clean_dtypes(result_df)
 
-    def get_spatial_data(self, format="df"):
+    def get_spatial_data(self, format="df", processes=None, max_pending=None):
 
         """
         Retrieve spatial data for the United States Drought Monitor (USDM) for a specific date.
         Parameters:
         format (str): The format in which to return the data. Options are "df" for a GeoDataFrame (default) 
                 or "json" for a JSON object.
+        processes (int, optional): Number of processes parsing the maps into GeoDataFrames. Parsing GeoJSON
+                is CPU bound, so a process pool speeds up long periods. Defaults to parsing in the download
+                threads. Maps are downloaded by max_workers threads.
+        max_pending (int, optional): Most maps downloaded or parsed ahead of the one being added to the
+                result, bounding the raw and parsed maps held in flight. Defaults to twice the larger of
+                max_workers and processes.
         Returns:
         GeoDataFrame or dict: The spatial data for the specified date in the requested format.
         Raises:
@@ -1085,8 +3314,62 @@ class USDM:
         - This method is only applicable to national data. If the geography is not "TOTAL" or "CONUS", 
           it defaults to returning data for the whole United States.
         - The method prints a message indicating the date for which data is being retrieved.
+        - Every map is held in memory; use iter_spatial_data to process long periods one map at a time.
+        """
+
+        # store the map data in a dictionary keyed by map date
+        return dict(self.iter_spatial_data(format, processes, max_pending))
+
+    def iter_spatial_data(self, format="df", processes=None, max_pending=None):
+        """
+        Retrieve spatial data like get_spatial_data, but yield the maps one at
+        a time in chronological order instead of returning a dict of every
+        map, so memory use does not grow with the length of the period.
+
+        Parameters:
+        -----------
+        format, processes, max_pending :
+            See get_spatial_data. Besides the map being yielded, at most
+            max_pending maps are held in memory.
+
+        Yields:
+        -------
+        tuple of (str, GeoDataFrame or dict)
+            The map date ('MM/DD/YYYY', the get_spatial_data key) and its data.
+
+        Examples:
+        --------
+        usdm_instance = USDM(geography="US", time_period=[2000, 2024])
+        for map_date, gdf in usdm_instance.iter_spatial_data():
+            gdf.to_file(f"usdm_{map_date.replace('/', '')}.gpkg")
+        """
+        from tqdm import tqdm
+
+        # get the map dates (in YYYYMMDD format) covered by the time period
+        map_dates = self._spatial_map_dates()
+
+        # loop over each map as it is downloaded and parsed
+        maps = self._fetch_maps(map_dates, format, processes, max_pending)
+        prog_bar = tqdm(maps, total=len(map_dates))
+
+        try:
+            for m, data in prog_bar:
+                # print a user message
+                m_label = f'{m[4:6]}/{m[6:8]}/{m[0:4]}'
+
+                prog_bar.set_description(f"Retrieved data for map dated: {m_label}")
+
+                yield m_label, data
+        finally:
+            # stop the downloads if the caller stops early
+            prog_bar.close()
+            maps.close()
+
+    def _spatial_map_dates(self):
+        """
+        Return the map dates (in 'YYYYMMDD' format) that get_spatial_data
+        retrieves for the object's time period.
         """
-        
         if self.geography not in ["TOTAL", "CONUS"]:
             print("The get_spatial_data method is only applicable to national data. Defaulting to returning data for the whole United States.")
         
@@ -1102,35 +3385,296 @@ class USDM:
             
             # get the full range of dates between the start and end date
             map_dates = pd.date_range(start=min(self.cleaned_dates),
-                                      end=max(self.cleaned_dates)).strftime("%m/%d/%Y").tolist()
+                                      end=max(self.cleaned_dates))
             
         # get the closest map date for each date in map_dates, then keep the 
         # unique set to end up with the full range of avaliable map dates that 
         # are avaliable on USDM
-        map_dates = list(set(get_closest_mapdate(date) for date in map_dates))
-    
-        # initialize a dictionary to store the map data
-        geo_data = {}
+        return sorted(set(get_closest_mapdates(map_dates, session=self.session)))
+
+    def _fetch_map(self, m, format, parse_pool=None, downloads=None):
+        """
+        Download the map dated m ('YYYYMMDD') and return it as a GeoDataFrame
+        (format="df") or a dict (format="json").
 
-        # loop over each map date
-        prog_bar = tqdm(map_dates)
+        With a map_store, a GeoDataFrame is read from the store if it was
+        downloaded before and added to it otherwise. If parse_pool (a
+        ProcessPoolExecutor) is given the GeoJSON is parsed in it, and the
+        download is made while holding downloads (a semaphore), if given.
+        """
+        store = self.map_store if format == "df" else None
 
-        for m in prog_bar:
-            # print a user message
-            m_label = f'{m[4:6]}/{m[6:8]}/{m[0:4]}'
-            
-            prog_bar.set_description(f"Retrieving data for map dated: {m_label}")
+        # read the map from the local store if it was downloaded before
+        if store is not None:
+            data = store.get(m)
+            if data is not None:
+                return data
 
-            url = f"https://droughtmonitor.unl.edu/data/json/usdm_{m}.json"
-            
-            if format == "json":
-                response = requests.get(url)
-                data = response.json()
-            
-            if format == "df":
-                data = gpd.read_file(url)
+        if downloads is not None:
+            with downloads:
+                content = self._fetch(map_url(m)).content
+        else:
+            content = self._fetch(map_url(m)).content
+
+        if parse_pool is None:
+            data = read_map(content, format)
+        else:
+            data = parse_pool.submit(read_map, content, format).result()
+
+        if store is not None:
+            store.set(m, data)
+        return data
+
+    def _fetch_maps(self, map_dates, format, processes=None, max_pending=None):
+        """
+        Download (with max_workers threads) and parse (in a pool of processes
+        processes when format is "df") each map in map_dates. With a
+        map_store, stored maps are read from it and new maps are added.
+
+        Yields:
+        -------
+        tuple of (str, GeoDataFrame or dict)
+            Each map date with its data, in the order of map_dates. At most
+            max_pending maps are downloaded or parsed ahead of the map being
+            yielded.
+        """
+        if max_pending is None:
+            max_pending = 2 * max(self.max_workers, processes or 1)
+
+        parse_pool = None
+        threads = self.max_workers
+        if processes is not None and processes > 1 and format == "df":
+            import multiprocessing
+
+            # the pool's workers are started from the download threads, and
+            # forking a multi-threaded process can deadlock the child
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn")
+            parse_pool = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+            # extra threads wait on the parses while max_workers download
+            threads += processes
+        downloads = threading.Semaphore(self.max_workers)
+
+        def fetch_map(m):
+            return self._fetch_map(m, format, parse_pool, downloads)
+
+        map_dates = iter(map_dates)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            # futures are consumed in submission order
+            pending = deque((m, executor.submit(fetch_map, m))
+                            for m in islice(map_dates, max_pending))
+            try:
+                while pending:
+                    m, future = pending.popleft()
+                    data = future.result()
+                    next_m = next(map_dates, None)
+                    if next_m is not None:
+                        pending.append((next_m, executor.submit(fetch_map, next_m)))
+                    yield m, data
+            finally:
+                # don't wait for maps that will not be used
+                for _, future in pending:
+                    future.cancel()
+                if parse_pool is not None:
+                    parse_pool.shutdown(cancel_futures=True)
+
+
+class AsyncUSDM(USDM):
+    """
+    An asyncio counterpart of USDM whose data retrieval methods are
+    coroutines.
+
+    AsyncUSDM takes the same arguments as USDM and builds its queries, renames
+    columns and merges results in exactly the same way. Each API call is run
+    in a worker thread using the object's pooled session, and at most
+    max_concurrency calls are in flight at once, so many AsyncUSDM objects
+    (e.g. different geographies or time periods) can be awaited concurrently
+    on one event loop without blocking it.
+
+    Additional Attributes:
+    ----------------------
+    max_concurrency : int, optional
+        Maximum number of API calls in flight at the same time (default 10).
+    semaphore : asyncio.Semaphore, optional
+        Semaphore bounding the API calls. Pass the same semaphore to several
+        AsyncUSDM objects to bound their combined concurrency. By default each
+        object creates its own with max_concurrency slots in every event loop
+        it is used in.
+
+    The calls run in a pool of max_concurrency threads owned by the object,
+    which is shut down by close.
+
+    Examples:
+    ---------
+    async def main():
+        states = ["CA", "OR", "WA"]
+        semaphore = asyncio.Semaphore(16)
+        objects = [AsyncUSDM(geography=s, time_period=[2020, 2021],
+                             semaphore=semaphore) for s in states]
+        results = await asyncio.gather(*(o.get_comp_stats() for o in objects))
+
+    asyncio.run(main())
+    """
+
+    def __init__(self, *args, max_concurrency=10, semaphore=None, **kwargs):
+        if not isinstance(max_concurrency, int) or max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+
+        # size the connection pool to the number of concurrent calls
+        kwargs.setdefault("pool_size", max(max_concurrency, 10))
+        super().__init__(*args, **kwargs)
+
+        self.max_concurrency = max_concurrency
+        self.semaphore = semaphore
+
+        # the event loop's default executor has too few threads for a large
+        # max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        # default semaphore and the event loop it was created in
+        self._loop_semaphore = (None, None)
+
+    def close(self):
+        """
+        Shut down the object's threads, then close the session, cache and
+        checkpoint as USDM.close does.
+        """
+        self._executor.shutdown(wait=True)
+        super().close()
+
+    def _concurrent_requests(self):
+        return self.max_concurrency
+
+    async def _run(self, func, *args):
+        """
+        Run a blocking call in a worker thread once a semaphore slot is free.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphore
+        if semaphore is None:
+            # a semaphore can only be used in the event loop it was first
+            # used in, so create one for each loop
+            semaphore_loop, semaphore = self._loop_semaphore
+            if semaphore_loop is not loop:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop_semaphore = (loop, semaphore)
+
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def get_comp_stats(self,
+                             stat=["Area", "AreaPercent", "Population","PopulationPercent","DSCI"],
+                             drought_threshold=[0, 1, 2, 3, 4],
+                             threshold_range=None,
+                             previous=None,
+                             on_error="raise",
+                             geographies=None):
+        """
+        Coroutine version of USDM.get_comp_stats. Returns the same DataFrame.
+
+        Parameters:
+        -----------
+        stat, drought_threshold, threshold_range, previous, on_error, geographies :
+            See USDM.get_comp_stats. Writing the results to Parquet (output)
+            is not supported.
+        """
+        import asyncio
+
+        errors = self._reset_errors(on_error)
+
+        # clean drought threshold argument and type check it
+        drought_threshold = clean_drought_threshold(drought_threshold)
+
+        # clean stat input and type check it
+        stat = clean_stat(stat)
+
+        # load the results being refreshed
+        if previous is not None:
+            previous = await asyncio.to_thread(load_previous_results, previous)
+
+        # build the list of urls to query for each geography
+        # in a worker thread, as it may wait for the user to confirm
+        queries = await self._run(self._plan_comp_stats, stat, drought_threshold,
+                                  threshold_range, previous, geographies)
+        if queries is None:
+            return pd.DataFrame()
+
+        # fetch every url concurrently, asyncio.gather keeps the input order
+        frames = await asyncio.gather(*(
+            self._run(self._fetch_comp_stat, q, drought_threshold)
+            for _, geo_queries in queries for q in geo_queries
+        ), return_exceptions=errors is not None)
+
+        # merge the statistics for each geography
+        all_results = []
+        frames = iter(frames)
+        for geo, geo_queries in queries:
+            geo_frames = [next(frames) for _ in geo_queries]
+
+            # record failed requests and leave their geography out
+            failed = [(q, e) for q, e in zip(geo_queries, geo_frames)
+                      if isinstance(e, BaseException)]
+            for q, e in failed:
+                if not isinstance(e, Exception):
+                    raise e
+                errors.append(FailedRequest(
+                    geography=geo, stat=query_stat(q), url=q,
+                    status_code=getattr(e, "status_code", None), exception=e))
+            if failed:
+                continue
+
+            geo_result_df = self._merge_comp_stats(geo, geo_frames)
+            if geo_result_df is not None:
+                all_results.append(geo_result_df)
+
+        result_df = self._finalize_comp_stats(all_results, drought_threshold)
+
+        if previous is not None:
+            result_df = self._append_comp_stats(previous, result_df)
+
+        return result_df
+
+    async def get_weeks_in_drought(self, drought_threshold=[0, 1, 2, 3, 4], stat=["consecutive", "nonconsecutive"]):
+        """
+        Coroutine version of USDM.get_weeks_in_drought. Returns the same
+        DataFrame.
+
+        Parameters:
+        -----------
+        drought_threshold, stat :
+            See USDM.get_weeks_in_drought. Writing the results to Parquet
+            (output) is not supported.
+        """
+        import asyncio
+
+        # clean drought threshold argument and type check it
+        drought_threshold = clean_drought_threshold(drought_threshold)
+
+        # clean stat input and type check it
+        stat = clean_stat(stat)
+
+        query = self._weeks_in_drought_queries(self.geography, stat, drought_threshold)
+
+        frames = await asyncio.gather(*(
+            self._run(self._fetch_weeks_in_drought, q) for q in query
+        ))
+
+        return self._finalize_weeks_in_drought(list(frames))
+
+    async def get_spatial_data(self, format="df"):
+        """
+        Coroutine version of USDM.get_spatial_data. Maps are downloaded (and
+        parsed) concurrently; the returned dict is the same as USDM's.
+        """
+        import asyncio
 
-            geo_data[m_label] = data
+        map_dates = await self._run(self._spatial_map_dates)
 
-        return geo_data
+        data = await asyncio.gather(*(
+            self._run(self._fetch_map, m, format) for m in map_dates
+        ))
 
+        return {f'{m[4:6]}/{m[6:8]}/{m[0:4]}': d for m, d in zip(map_dates, data)}